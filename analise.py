@@ -0,0 +1,146 @@
+#Análises sobre o histórico de todas as contas com NumPy (risco e relatórios)
+#
+#exportar_historicos junta os históricos em um único array estruturado, com as colunas conta,
+#tipo (código de HistoricoColunar.CODIGOS), centavos e instante (segundos). As agregações são
+#feitas sobre as colunas, sem percorrer os dicionários das transações em Python: np.unique e
+#np.bincount fazem o agrupamento por dia ou por conta.
+#
+#O NumPy é opcional para o restante do sistema, só este módulo depende dele (pip install numpy).
+from datetime import datetime, timezone
+
+from desafio_date_time_sistema_bancario import HistoricoColunar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEPOSITO = HistoricoColunar.CODIGOS["Deposito"]
+SAQUE = HistoricoColunar.CODIGOS["Saque"]
+
+if np is not None:
+    TIPO_TRANSACAO = np.dtype([("conta", "i8"), ("tipo", "i1"), ("centavos", "i8"), ("instante", "f8")])
+
+def _exigir_numpy():
+    if np is None:
+        raise ImportError("O módulo analise requer o NumPy: pip install numpy")
+
+def exportar_historicos(contas):
+    _exigir_numpy()
+    partes = []
+
+    for conta in contas:
+        historico = conta.historico
+
+        if isinstance(historico, HistoricoColunar):
+            #Sem transações, as colunas ainda não foram criadas
+            if not historico._instantes:
+                continue
+
+            #As colunas do histórico já são arrays, copiadas sem montar cada transação
+            parte = np.empty(len(historico._tipos), TIPO_TRANSACAO)
+            parte["tipo"] = np.frombuffer(historico._tipos, "i1")
+            parte["centavos"] = np.frombuffer(historico._centavos, "i8")
+            parte["instante"] = np.frombuffer(historico._instantes, "f8")
+
+        else:
+            #Historico com dicionários (não é mais o padrão das contas): monta as colunas transação a transação
+            transacoes = historico.transacoes
+            parte = np.empty(len(transacoes), TIPO_TRANSACAO)
+            parte["tipo"] = [HistoricoColunar.CODIGOS[transacao["tipo"]] for transacao in transacoes]
+            parte["centavos"] = [transacao["valor"] for transacao in transacoes]
+
+            #Os históricos em memória mantêm a coluna de instantes usada na busca por período
+            if historico._instantes and len(historico._instantes) == len(transacoes):
+                parte["instante"] = np.frombuffer(historico._instantes, "f8")
+            else:
+                parte["instante"] = [transacao["data"].timestamp() for transacao in transacoes]
+
+        parte["conta"] = conta.numero
+        partes.append(parte)
+
+    if not partes:
+        return np.empty(0, TIPO_TRANSACAO)
+
+    return np.concatenate(partes)
+
+def _agrupar_soma(chaves, valores):
+    #Soma os valores por chave; a soma em float64 é exata para totais abaixo de 2**53 centavos
+    if len(chaves) == 0:
+        return chaves[:0], np.zeros(0, np.int64)
+
+    menor = chaves.min()
+    faixa = int(chaves.max() - menor) + 1
+
+    if faixa <= 4 * len(chaves):
+        #Chaves densas (dias, números de conta sequenciais): bincount direto, sem ordenar
+        deslocadas = chaves - menor
+        somas = np.bincount(deslocadas, weights=valores, minlength=faixa)
+        presentes = np.bincount(deslocadas, minlength=faixa) > 0
+        return np.flatnonzero(presentes) + menor, somas[presentes].astype(np.int64)
+
+    grupos, posicoes = np.unique(chaves, return_inverse=True)
+    somas = np.bincount(posicoes, weights=valores, minlength=len(grupos))
+    return grupos, somas.astype(np.int64)
+
+def _deslocamento_fuso(instante):
+    return datetime.fromtimestamp(instante, timezone.utc).astimezone().utcoffset().total_seconds()
+
+def _deslocamentos_fuso(instantes):
+    #Deslocamento do fuso local em cada instante, com o horário de verão da própria data. É calculado
+    #uma vez por dia UTC; só nos dias em que o deslocamento muda cada instante é calculado
+    dias_utc, posicoes = np.unique((instantes // 86_400).astype("i8"), return_inverse=True)
+    inicio = np.array([_deslocamento_fuso(dia * 86_400) for dia in dias_utc.tolist()], "f8")
+    fim = np.array([_deslocamento_fuso(dia * 86_400 + 86_399) for dia in dias_utc.tolist()], "f8")
+
+    deslocamentos = inicio[posicoes]
+    mudou = (inicio != fim)[posicoes]
+    deslocamentos[mudou] = [_deslocamento_fuso(instante) for instante in instantes[mudou].tolist()]
+    return deslocamentos
+
+def totais_saque_por_dia(transacoes):
+    #Dias (datetime64[D], no fuso horário local) e total sacado em centavos em cada dia
+    _exigir_numpy()
+    saques = transacoes[transacoes["tipo"] == SAQUE]
+
+    instantes = saques["instante"]
+    dias = ((instantes + _deslocamentos_fuso(instantes)) // 86_400).astype("i8")
+
+    dias, totais = _agrupar_soma(dias, saques["centavos"])
+    return dias.astype("datetime64[D]"), totais
+
+def maiores_volumes(transacoes, quantidade=10):
+    #Contas com o maior volume movimentado (depósitos + saques), em ordem decrescente
+    _exigir_numpy()
+    contas, volumes = _agrupar_soma(transacoes["conta"], transacoes["centavos"])
+
+    if len(contas) > quantidade:
+        maiores = np.argpartition(volumes, -quantidade)[-quantidade:]
+        contas, volumes = contas[maiores], volumes[maiores]
+
+    ordem = np.argsort(volumes, kind="stable")[::-1]
+    return contas[ordem], volumes[ordem]
+
+def _limite_saque(conta):
+    politica = conta.politica
+    limite = politica.valor_maximo_operacao("saque") if politica else None
+    return np.inf if limite is None else limite
+
+def contas_perto_do_limite(transacoes, contas, fracao=0.9):
+    #Números das contas cujo maior saque chegou a pelo menos `fracao` do valor máximo por saque da política
+    _exigir_numpy()
+    numeros = np.fromiter((conta.numero for conta in contas), "i8", len(contas))
+    limites = np.fromiter((_limite_saque(conta) for conta in contas), "f8", len(contas))
+
+    ordem = np.argsort(numeros)
+    numeros, limites = numeros[ordem], limites[ordem]
+
+    saques = transacoes[transacoes["tipo"] == SAQUE]
+    posicoes = np.searchsorted(numeros, saques["conta"])
+    conhecidas = posicoes < len(numeros)
+    conhecidas[conhecidas] = numeros[posicoes[conhecidas]] == saques["conta"][conhecidas]
+
+    maiores_saques = np.zeros(len(numeros), "i8")
+    np.maximum.at(maiores_saques, posicoes[conhecidas], saques["centavos"][conhecidas])
+
+    return numeros[maiores_saques >= fracao * limites]
@@ -0,0 +1,266 @@
+#Armazenamento de clientes, contas e transações em SQLite
+#
+#Os índices cobrem as consultas do menu: CPF (único), transações por (conta, data) e por
+#(conta, tipo, data). As listagens são paginadas pela chave (a página seguinte começa depois da
+#última linha lida), sem OFFSET, então percorrer tudo custa o mesmo em qualquer posição. As conexões ficam em um pool e reutilizam os comandos preparados (cache de
+#statements do sqlite3). As transações são inseridas em lote, junto com o saldo das contas.
+#Valores e saldos são gravados em centavos (INTEGER).
+#Use um arquivo em disco: cada conexão com ":memory:" abriria um banco diferente.
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS clientes (
+    cpf TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    endereco TEXT NOT NULL,
+    data_nasc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS contas (
+    numero INTEGER PRIMARY KEY,
+    cpf TEXT NOT NULL REFERENCES clientes (cpf),
+    agencia TEXT NOT NULL,
+    saldo INTEGER NOT NULL,
+    aberta_em REAL
+);
+
+CREATE INDEX IF NOT EXISTS contas_cpf ON contas (cpf);
+
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY,
+    conta INTEGER NOT NULL REFERENCES contas (numero),
+    tipo INTEGER NOT NULL,
+    centavos INTEGER NOT NULL,
+    instante REAL NOT NULL,
+    saldo INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS transacoes_conta_data ON transacoes (conta, instante);
+DROP INDEX IF EXISTS transacoes_conta_tipo;
+CREATE INDEX IF NOT EXISTS transacoes_conta_tipo_data ON transacoes (conta, tipo, instante);
+"""
+
+class PoolConexoes:
+    def __init__(self, caminho, tamanho=4):
+        self._conexoes = []
+        self._livres = queue.Queue()
+
+        for _ in range(tamanho):
+            conexao = sqlite3.connect(caminho, check_same_thread=False, cached_statements=256)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._conexoes.append(conexao)
+            self._livres.put(conexao)
+
+    @contextmanager
+    def conexao(self):
+        conexao = self._livres.get()
+
+        try:
+            yield conexao
+        finally:
+            self._livres.put(conexao)
+
+    def fechar(self):
+        for conexao in self._conexoes:
+            conexao.close()
+
+class ArmazenamentoSQLite:
+    def __init__(self, caminho, tamanho_pool=4, tamanho_lote=1000):
+        self._pool = PoolConexoes(caminho, tamanho_pool)
+        self._tamanho_lote = tamanho_lote
+        self._transacoes_pendentes = []
+        self._saldos_pendentes = {}
+        self._trava = threading.Lock()
+
+        with self._pool.conexao() as conexao:
+            conexao.executescript(ESQUEMA)
+
+            #Bancos criados antes da coluna: a abertura das contas existentes fica desconhecida (NULL)
+            colunas = {coluna[1] for coluna in conexao.execute("PRAGMA table_info(contas)")}
+
+            if "aberta_em" not in colunas:
+                conexao.execute("ALTER TABLE contas ADD COLUMN aberta_em REAL")
+
+    def salvar_cliente(self, cpf, nome, endereco, data_nasc):
+        #A chave primária garante que o mesmo CPF não seja cadastrado duas vezes
+        try:
+            with self._pool.conexao() as conexao, conexao:
+                conexao.execute(
+                    "INSERT INTO clientes (cpf, nome, endereco, data_nasc) VALUES (?, ?, ?, ?)",
+                    (cpf, nome, endereco, data_nasc),
+                )
+        except sqlite3.IntegrityError:
+            return False
+
+        return True
+
+    def salvar_conta(self, numero, cpf, agencia, saldo, aberta_em):
+        try:
+            with self._pool.conexao() as conexao, conexao:
+                conexao.execute(
+                    "INSERT INTO contas (numero, cpf, agencia, saldo, aberta_em) VALUES (?, ?, ?, ?, ?)",
+                    (numero, cpf, agencia, saldo, aberta_em),
+                )
+        except sqlite3.IntegrityError:
+            return False
+
+        return True
+
+    def registrar_transacao(self, numero, tipo, centavos, instante, saldo):
+        with self._trava:
+            self._transacoes_pendentes.append((numero, tipo, centavos, instante, saldo))
+            self._saldos_pendentes[numero] = saldo
+
+            if len(self._transacoes_pendentes) >= self._tamanho_lote:
+                self._gravar_lote()
+
+    def _gravar_lote(self):
+        if not self._transacoes_pendentes:
+            return
+
+        with self._pool.conexao() as conexao, conexao:
+            conexao.executemany(
+                "INSERT INTO transacoes (conta, tipo, centavos, instante, saldo) VALUES (?, ?, ?, ?, ?)",
+                self._transacoes_pendentes,
+            )
+            conexao.executemany(
+                "UPDATE contas SET saldo = ? WHERE numero = ?",
+                [(saldo, numero) for numero, saldo in self._saldos_pendentes.items()],
+            )
+
+        self._transacoes_pendentes = []
+        self._saldos_pendentes = {}
+
+    def gravar_lote(self):
+        with self._trava:
+            self._gravar_lote()
+
+    def _consultar(self, sql, parametros=()):
+        #Grava o lote pendente antes de ler, para a consulta enxergar as últimas transações
+        if self._transacoes_pendentes:
+            self.gravar_lote()
+
+        with self._pool.conexao() as conexao:
+            return conexao.execute(sql, parametros).fetchall()
+
+    def buscar_cliente(self, cpf):
+        linhas = self._consultar("SELECT cpf, nome, endereco, data_nasc FROM clientes WHERE cpf = ?", (cpf,))
+        return linhas[0] if linhas else None
+
+    def quantidade_clientes(self):
+        return self._consultar("SELECT COUNT(*) FROM clientes")[0][0]
+
+    def cpfs_clientes(self, apos="", limite=1000):
+        #CPFs em ordem, a partir do primeiro maior que `apos`
+        linhas = self._consultar("SELECT cpf FROM clientes WHERE cpf > ? ORDER BY cpf LIMIT ?", (apos, limite))
+        return [cpf for (cpf,) in linhas]
+
+    def contas_cliente(self, cpf):
+        return self._consultar(
+            "SELECT numero, agencia, saldo, aberta_em FROM contas WHERE cpf = ? ORDER BY numero", (cpf,)
+        )
+
+    def quantidade_contas(self):
+        return self._consultar("SELECT COUNT(*) FROM contas")[0][0]
+
+    def contas_apos(self, numero=0, limite=1000):
+        #(numero, cpf, agencia) em ordem de número, a partir da primeira conta com número maior que `numero`
+        return self._consultar(
+            "SELECT numero, cpf, agencia FROM contas WHERE numero > ? ORDER BY numero LIMIT ?", (numero, limite)
+        )
+
+    def conta_na_posicao(self, posicao):
+        linhas = self._consultar("SELECT numero, cpf, agencia FROM contas ORDER BY numero LIMIT 1 OFFSET ?", (posicao,))
+        return linhas[0] if linhas else None
+
+    def maior_numero_conta(self):
+        return self._consultar("SELECT COALESCE(MAX(numero), 0) FROM contas")[0][0]
+
+    def cpf_da_conta(self, numero, agencia):
+        linhas = self._consultar("SELECT cpf FROM contas WHERE numero = ? AND agencia = ?", (numero, agencia))
+        return linhas[0][0] if linhas else None
+
+    def saldo_em(self, numero, data):
+        #Saldo gravado na última transação até a data, pelo índice (conta, instante)
+        linhas = self._consultar(
+            "SELECT saldo FROM transacoes WHERE conta = ? AND instante <= ? ORDER BY instante DESC, id DESC LIMIT 1",
+            (numero, data.timestamp()),
+        )
+
+        if linhas:
+            return linhas[0][0]
+
+        #Antes da primeira transação: desfaz o efeito dela sobre o saldo
+        linhas = self._consultar(
+            "SELECT tipo, centavos, saldo FROM transacoes WHERE conta = ? ORDER BY instante, id LIMIT 1", (numero,)
+        )
+
+        if not linhas:
+            return None
+
+        tipo, centavos, saldo = linhas[0]
+        return saldo - centavos if tipo == 0 else saldo + centavos
+
+    def ultimo_instante(self, numero):
+        return self._consultar("SELECT MAX(instante) FROM transacoes WHERE conta = ?", (numero,))[0][0]
+
+    def _filtro_transacoes(self, numero, tipo, inicio, fim):
+        condicoes = ["conta = ?"]
+        parametros = [numero]
+
+        if tipo is not None:
+            condicoes.append("tipo = ?")
+            parametros.append(tipo)
+
+        if inicio is not None:
+            condicoes.append("instante >= ?")
+            parametros.append(inicio.timestamp())
+
+        if fim is not None:
+            condicoes.append("instante < ?")
+            parametros.append(fim.timestamp())
+
+        return " AND ".join(condicoes), parametros
+
+    def contar_transacoes(self, numero, tipo=None, inicio=None, fim=None):
+        condicao, parametros = self._filtro_transacoes(numero, tipo, inicio, fim)
+        return self._consultar(f"SELECT COUNT(*) FROM transacoes WHERE {condicao}", parametros)[0][0]
+
+    def transacoes(self, numero, tipo=None, inicio=None, fim=None, deslocamento=0, limite=-1, tamanho_pagina=1000,
+                   decrescente=False):
+        #Percorre as transações em páginas pelo índice (conta, instante) ou (conta, tipo, instante),
+        #sem carregar tudo em memória. Só a primeira página usa o deslocamento; as seguintes começam
+        #depois da última (instante, id) lida.
+        condicao, parametros = self._filtro_transacoes(numero, tipo, inicio, fim)
+        ordem = "instante DESC, id DESC" if decrescente else "instante, id"
+        colunas = "SELECT tipo, centavos, instante, saldo, id FROM transacoes"
+        sql_primeira = f"{colunas} WHERE {condicao} ORDER BY {ordem} LIMIT ? OFFSET ?"
+        sql_seguinte = f"{colunas} WHERE {condicao} AND (instante, id) {'<' if decrescente else '>'} (?, ?) ORDER BY {ordem} LIMIT ?"
+        ultima = None
+
+        while limite != 0:
+            pagina = tamanho_pagina if limite < 0 else min(limite, tamanho_pagina)
+
+            if ultima is None:
+                linhas = self._consultar(sql_primeira, (*parametros, pagina, deslocamento))
+            else:
+                linhas = self._consultar(sql_seguinte, (*parametros, ultima[2], ultima[4], pagina))
+
+            for linha in linhas:
+                yield linha[:4]
+
+            if len(linhas) < pagina:
+                return
+
+            ultima = linhas[-1]
+
+            if limite > 0:
+                limite -= len(linhas)
+
+    def fechar(self):
+        self.gravar_lote()
+        self._pool.fechar()
@@ -0,0 +1,27 @@
+#API do Banco PC para outros programas, sem o menu interativo
+#
+#Importar este módulo não lê nem grava dados e não inicia o menu. Exemplo:
+#  from banco import Banco
+#
+#  with Banco.abrir("dados") as banco:
+#      banco.cadastrar_cliente("11122233344", "Ana", "Rua A", "01/01/1990")
+#      conta = banco.cadastrar_conta("11122233344")
+#      banco.depositar("11122233344", 10_000)
+#
+#Banco() sem abrir mantém tudo só em memória. Valores em centavos (para_centavos converte reais).
+from desafio_date_time_sistema_bancario import (
+    Banco,
+    Cliente,
+    Conta,
+    ContaCorrente,
+    ContextoBanco,
+    Deposito,
+    ErroBanco,
+    Historico,
+    PessoaFisica,
+    ResultadoOperacao,
+    Saque,
+    Transacao,
+    formatar_reais,
+    para_centavos,
+)
@@ -0,0 +1,107 @@
+#Agregações do módulo analise (NumPy) contra o laço em Python sobre as transações do histórico
+#
+#Monta contas com históricos sintéticos (30 dias), calcula saques por dia, maiores volumes e
+#contas perto do limite pelos dois caminhos e confere que os resultados são iguais. O tempo do
+#NumPy comparado com o laço inclui a exportação dos históricos para o array.
+#
+#Uso: python benchmarks/benchmark_analise.py [contas] [transacoes_por_conta]
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analise
+from desafio_date_time_sistema_bancario import ContaCorrente, Deposito, PessoaFisica, Saque, contexto_padrao
+
+LIMITE_SAQUE = contexto_padrao.motor_politicas.politica(ContaCorrente.__name__).valor_maximo_operacao("saque")
+
+def criar_contas(quantidade_contas, transacoes_por_conta, semente=42):
+    sorteio = random.Random(semente)
+    inicio = datetime.now() - timedelta(days=30)
+    contas = []
+
+    for numero in range(1, quantidade_contas + 1):
+        cliente = PessoaFisica("Rua A", f"{numero:011d}", "Cliente", "01/01/1990")
+        conta = ContaCorrente.nova_conta(numero, cliente)
+        cliente.adicionar_conta(conta)
+
+        segundos = sorted(sorteio.uniform(0, 30 * 86_400) for _ in range(transacoes_por_conta))
+
+        for segundo in segundos:
+            transacao = (Deposito if sorteio.random() < 0.5 else Saque)(sorteio.randint(1, LIMITE_SAQUE))
+            conta.historico.adicionar_transacao(transacao, inicio + timedelta(seconds=segundo), conta.saldo)
+
+        contas.append(conta)
+
+    return contas
+
+def agregar_em_python(contas, quantidade=10, fracao=0.9):
+    saques_por_dia = defaultdict(int)
+    volumes = {}
+    perto_do_limite = []
+
+    for conta in contas:
+        volume = 0
+        maior_saque = 0
+
+        for transacao in conta.historico.transacoes:
+            valor = transacao["valor"]
+            volume += valor
+
+            if transacao["tipo"] == "Saque":
+                saques_por_dia[transacao["data"].date()] += valor
+                maior_saque = max(maior_saque, valor)
+
+        volumes[conta.numero] = volume
+
+        if maior_saque >= fracao * LIMITE_SAQUE:
+            perto_do_limite.append(conta.numero)
+
+    maiores = sorted(volumes.items(), key=lambda item: item[1], reverse=True)[:quantidade]
+
+    return dict(saques_por_dia), maiores, perto_do_limite
+
+def agregar_com_numpy(transacoes, contas, quantidade=10, fracao=0.9):
+    dias, totais = analise.totais_saque_por_dia(transacoes)
+    numeros, volumes = analise.maiores_volumes(transacoes, quantidade)
+    perto_do_limite = analise.contas_perto_do_limite(transacoes, contas, fracao)
+
+    return (
+        {dia.item(): int(total) for dia, total in zip(dias, totais)},
+        [(int(numero), int(volume)) for numero, volume in zip(numeros, volumes)],
+        perto_do_limite.tolist(),
+    )
+
+def main():
+    quantidade_contas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    transacoes_por_conta = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    contas = criar_contas(quantidade_contas, transacoes_por_conta)
+
+    inicio = time.perf_counter()
+    esperado = agregar_em_python(contas)
+    duracao_python = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    transacoes = analise.exportar_historicos(contas)
+    duracao_exportacao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtido = agregar_com_numpy(transacoes, contas)
+    duracao_numpy = time.perf_counter() - inicio
+
+    print(f"Contas: {quantidade_contas} | Transações: {len(transacoes)}")
+    duracao_total = duracao_exportacao + duracao_numpy
+
+    print(f"Laço em Python:\t\t{duracao_python * 1000:.1f} ms")
+    print(f"Exportação NumPy:\t{duracao_exportacao * 1000:.1f} ms")
+    print(f"Agregações NumPy:\t{duracao_numpy * 1000:.1f} ms")
+    print(f"Exportação + agregações:\t{duracao_total * 1000:.1f} ms ({duracao_python / duracao_total:.1f}x)")
+    print(f"Resultados iguais:\t{obtido == esperado}")
+
+if __name__ == "__main__":
+    main()
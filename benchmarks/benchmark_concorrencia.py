@@ -0,0 +1,89 @@
+#Teste de carga do ExecutorTransacoes
+#
+#1. Vazão: depósitos e saques distribuídos entre poucas contas (alta disputa) com 1, 2, 4 e 8
+#   threads, conferindo ao final que nenhum saldo divergiu do esperado (atualização perdida).
+#2. Limite diário: muitas threads tentam depositar ao mesmo tempo na mesma conta e o número de
+#   transações aceitas não pode passar do limite diário.
+#
+#Uso: python benchmarks/benchmark_concorrencia.py [transacoes_por_rodada]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concorrencia import ExecutorTransacoes
+from desafio_date_time_sistema_bancario import ContaCorrente, ContextoBanco, Deposito, PessoaFisica, Saque
+
+QUANTIDADE_CONTAS = 16
+
+def criar_contas(quantidade, limite_transacoes_dia):
+    contexto = ContextoBanco()
+    contexto.motor_politicas.definir({
+        "ContaCorrente": {
+            "saldo_inicial": 50_000,
+            "regras": [
+                {"regra": "quantidade_dia", "limite": limite_transacoes_dia},
+                {"regra": "valor_maximo_operacao", "operacoes": ["saque"], "centavos": 50_000},
+            ],
+        },
+    })
+
+    contas = []
+
+    for numero in range(1, quantidade + 1):
+        cliente = PessoaFisica("Rua A", f"{numero:011d}", "Cliente", "01/01/1990")
+        conta = ContaCorrente.nova_conta(numero, cliente, contexto)
+        cliente.adicionar_conta(conta)
+        contas.append(conta)
+
+    return contas
+
+def medir_vazao(threads, quantidade_transacoes):
+    contas = criar_contas(QUANTIDADE_CONTAS, quantidade_transacoes)
+    esperado = {conta.numero: conta.saldo for conta in contas}
+
+    inicio = time.perf_counter()
+
+    with ExecutorTransacoes(max_threads=threads) as executor:
+        futuros = []
+
+        for indice in range(quantidade_transacoes):
+            conta = contas[indice % len(contas)]
+            transacao = Deposito(1000) if indice % 2 == 0 else Saque(500)
+            futuros.append((conta, transacao, executor.submeter(conta.cliente, conta, transacao)))
+
+        for conta, transacao, futuro in futuros:
+            if futuro.result():
+                esperado[conta.numero] += transacao.valor if isinstance(transacao, Deposito) else -transacao.valor
+
+    duracao = time.perf_counter() - inicio
+    divergentes = sum(1 for conta in contas if conta.saldo != esperado[conta.numero])
+
+    return quantidade_transacoes / duracao, divergentes
+
+def verificar_limite_diario(threads, limite=2):
+    (conta,) = criar_contas(1, limite)
+
+    with ExecutorTransacoes(max_threads=threads) as executor:
+        futuros = [executor.submeter(conta.cliente, conta, Deposito(100)) for _ in range(threads * 50)]
+        aceitas = sum(1 for futuro in futuros if futuro.result())
+
+    return aceitas, limite
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    base = None
+
+    print(f"{'Threads':>8}{'Transações/s':>16}{'Escala':>10}{'Divergências':>14}")
+
+    for threads in (1, 2, 4, 8):
+        vazao, divergentes = medir_vazao(threads, quantidade)
+        base = base or vazao
+        print(f"{threads:>8}{vazao:>16.0f}{vazao / base:>10.2f}{divergentes:>14}")
+
+    aceitas, limite = verificar_limite_diario(8)
+    print(f"\nLimite diário: {aceitas} transações aceitas para limite {limite}")
+
+if __name__ == "__main__":
+    main()
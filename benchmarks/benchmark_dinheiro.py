@@ -0,0 +1,111 @@
+#Centavos inteiros x float no saldo das contas
+#
+#1. Vazão: depósitos e saques alternados em Conta, com o saldo em centavos (int) e com o
+#   layout anterior, em que o valor era convertido com float() e somado em reais.
+#2. Desvio: aplica operações aleatórias e compara o saldo final com a soma exata feita em
+#   Decimal. Em centavos o desvio tem que ser zero; no float ele cresce com as operações.
+#
+#Uso: python benchmarks/benchmark_dinheiro.py [operacoes_vazao] [operacoes_desvio]
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desafio_date_time_sistema_bancario import Conta, PessoaFisica, ResultadoOperacao, formatar_reais
+
+#Reproduz a aritmética de Conta antes dos centavos inteiros
+class ContaFloat(Conta):
+    __slots__ = ()
+
+    def __init__(self, numero, cliente):
+        super().__init__(numero, cliente)
+        self._saldo = 500.0
+
+    def sacar(self, valor):
+        valor = float(valor)
+
+        if valor > self._saldo:
+            return ResultadoOperacao.SALDO_INSUFICIENTE
+
+        elif valor > 0:
+            self._saldo -= valor
+            return ResultadoOperacao.SUCESSO
+
+        return ResultadoOperacao.VALOR_INVALIDO
+
+    def depositar(self, valor):
+        valor = float(valor)
+
+        if valor > 0:
+            self._saldo += valor
+            return ResultadoOperacao.SUCESSO
+
+        return ResultadoOperacao.VALOR_INVALIDO
+
+def medir_vazao(conta, deposito, saque, operacoes):
+    depositar = conta.depositar
+    sacar = conta.sacar
+
+    inicio = time.perf_counter()
+
+    for _ in range(operacoes // 2):
+        depositar(deposito)
+        sacar(saque)
+
+    return operacoes / (time.perf_counter() - inicio)
+
+def medir_desvio(operacoes, semente=42):
+    cliente = PessoaFisica("Rua A", "00000000000", "Cliente", "01/01/1990")
+    conta = Conta(1, cliente)
+    conta_float = ContaFloat(2, cliente)
+    esperado = Decimal("500.00")
+    sorteio = random.Random(semente)
+
+    for _ in range(operacoes):
+        centavos = sorteio.randint(1, 100_000)
+        reais = Decimal(centavos).scaleb(-2)
+
+        #A conta em float só recebe as operações aceitas pela conta em centavos, para seguirem juntas
+        if sorteio.random() < 0.5:
+            if conta.depositar(centavos):
+                conta_float.depositar(centavos / 100)
+                esperado += reais
+
+        elif conta.sacar(centavos):
+            conta_float.sacar(centavos / 100)
+            esperado -= reais
+
+    desvio_centavos = Decimal(conta.saldo).scaleb(-2) - esperado
+    desvio_float = Decimal(conta_float.saldo) - esperado
+
+    return esperado, conta.saldo, desvio_centavos, desvio_float
+
+def main():
+    operacoes_vazao = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    operacoes_desvio = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000
+
+    cliente = PessoaFisica("Rua A", "00000000000", "Cliente", "01/01/1990")
+    vazao_float = medir_vazao(ContaFloat(1, cliente), 10.10, 5.05, operacoes_vazao)
+    vazao_centavos = medir_vazao(Conta(2, cliente), 1010, 505, operacoes_vazao)
+
+    print(f"{'Saldo':>10}{'Operações/s':>15}")
+    print(f"{'float':>10}{vazao_float:>15.0f}")
+    print(f"{'centavos':>10}{vazao_centavos:>15.0f}")
+    print(f"Centavos / float: {vazao_centavos / vazao_float:.2f}")
+
+    esperado, saldo, desvio_centavos, desvio_float = medir_desvio(operacoes_desvio)
+
+    print(f"\nOperações aleatórias: {operacoes_desvio}")
+    print(f"Saldo esperado (Decimal):\tR$ {esperado}")
+    print(f"Saldo em centavos:\t\tR$ {formatar_reais(saldo)}")
+    print(f"Desvio em centavos:\t\t{desvio_centavos}")
+    print(f"Desvio em float:\t\t{desvio_float:.10f}")
+
+    if desvio_centavos != 0:
+        sys.exit("Saldo em centavos divergiu da soma exata")
+
+if __name__ == "__main__":
+    main()
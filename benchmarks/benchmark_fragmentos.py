@@ -0,0 +1,70 @@
+#Vazão do RoteadorContas com 1, 2, 4, ... fragmentos (até a quantidade de núcleos)
+#
+#Abre as contas, envia depósitos e saques em lotes e confere os saldos finais contra o
+#valor esperado. Em uma máquina com N núcleos livres a vazão deve crescer quase linearmente
+#até N fragmentos.
+#
+#Uso: python benchmarks/benchmark_fragmentos.py [transacoes] [contas] [tamanho_lote]
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fragmentos import RoteadorContas
+
+def medir(quantidade_fragmentos, transacoes, quantidade_contas, tamanho_lote):
+    #Mantém o limite por saque e libera a quantidade diária para todas as transações do teste
+    politicas = {
+        "ContaCorrente": {
+            "saldo_inicial": 50_000,
+            "regras": [
+                {"regra": "quantidade_dia", "limite": transacoes},
+                {"regra": "valor_maximo_operacao", "operacoes": ["saque"], "centavos": 50_000},
+            ],
+        },
+    }
+
+    with RoteadorContas(quantidade_fragmentos, politicas) as roteador:
+        roteador.executar_lote([("abrir", numero, f"{numero:011d}", "Cliente") for numero in range(1, quantidade_contas + 1)])
+
+        #Cada conta alterna depósitos de R$ 10,00 e saques de R$ 5,00 (em centavos), então o saldo nunca fica insuficiente
+        comandos = [
+            ("deposito", indice % quantidade_contas + 1, 1000) if (indice // quantidade_contas) % 2 == 0
+            else ("saque", indice % quantidade_contas + 1, 500)
+            for indice in range(transacoes)
+        ]
+        esperado = quantidade_contas * 50_000 + sum(1000 if comando[0] == "deposito" else -500 for comando in comandos)
+
+        inicio = time.perf_counter()
+
+        for posicao in range(0, transacoes, tamanho_lote):
+            roteador.executar_lote(comandos[posicao:posicao + tamanho_lote])
+
+        duracao = time.perf_counter() - inicio
+
+        saldos = roteador.executar_lote([("saldo", numero) for numero in range(1, quantidade_contas + 1)])
+
+    return transacoes / duracao, sum(saldos) == esperado
+
+def main():
+    transacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    quantidade_contas = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    tamanho_lote = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+
+    nucleos = multiprocessing.cpu_count()
+    fragmentos = sorted({1, *(2 ** expoente for expoente in range(1, nucleos.bit_length())), nucleos})
+
+    base = None
+
+    print(f"Núcleos: {nucleos}")
+    print(f"{'Fragmentos':>10}{'Transações/s':>16}{'Escala':>10}{'Saldos OK':>11}")
+
+    for quantidade in fragmentos:
+        vazao, saldos_ok = medir(quantidade, transacoes, quantidade_contas, tamanho_lote)
+        base = base or vazao
+        print(f"{quantidade:>10}{vazao:>16.0f}{vazao / base:>10.2f}{str(saldos_ok):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#Listagem de contas: print por conta contra as linhas em cache escritas em blocos
+#
+#Monta muitas contas e lista todas pelos dois caminhos, com a saída descartada. A segunda
+#listagem com cache reaproveita as linhas prontas; antes da terceira, 1% das contas muda de saldo
+#e só essas linhas são refeitas. Mede também uma página ordenada por saldo (heapq, sem ordenar
+#todas as contas) e confere que os textos gerados são iguais.
+#
+#Uso: python benchmarks/benchmark_listagem.py [contas]
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desafio_date_time_sistema_bancario import (
+    ContaCorrente,
+    ContaRegistry,
+    Deposito,
+    IteradorConta,
+    PessoaFisica,
+    escrever_em_blocos,
+    formatar_reais,
+    selecionar_contas,
+)
+
+def criar_contas(quantidade):
+    contas = ContaRegistry()
+
+    for numero in range(1, quantidade + 1):
+        cliente = PessoaFisica("Rua A", f"{numero:011d}", f"Cliente {numero % 997}", "01/01/1990")
+        conta = ContaCorrente.nova_conta(numero, cliente)
+        cliente.adicionar_conta(conta)
+        contas.adicionar(conta)
+
+    return contas
+
+def linha_sem_cache(conta):
+    #Linha montada como antes do cache, uma f-string completa por conta
+    return f"""\
+                    Agência:\t{conta.agencia}
+                    Número:\t{conta.numero}
+                    Titular:\t{conta.cliente.nome}
+                    Saldo:\tR$ {formatar_reais(conta.saldo)}
+                """
+
+def listar_com_print(contas):
+    for conta in contas:
+        print(linha_sem_cache(conta))
+
+def listar_com_cache(contas, cache):
+    escrever_em_blocos(f"{linha}\n" for linha in IteradorConta(contas, cache))
+
+def medir(funcao, *argumentos):
+    with open(os.devnull, "w", encoding="utf-8") as descarte, redirect_stdout(descarte):
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        return time.perf_counter() - inicio
+
+def capturar(funcao, *argumentos):
+    with redirect_stdout(io.StringIO()) as saida:
+        funcao(*argumentos)
+    return saida.getvalue()
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    contas = criar_contas(quantidade)
+    cache = contas.linhas
+
+    duracao_print = medir(listar_com_print, contas)
+    duracao_fria = medir(listar_com_cache, contas, cache)
+    duracao_quente = medir(listar_com_cache, contas, cache)
+
+    for posicao in range(0, quantidade, 100):
+        Deposito(100).registrar(contas[posicao])
+
+    duracao_alterada = medir(listar_com_cache, contas, cache)
+
+    inicio = time.perf_counter()
+    pagina = list(selecionar_contas(contas, ordenar_por="saldo", decrescente=True, deslocamento=50, limite=50))
+    duracao_pagina = time.perf_counter() - inicio
+
+    iguais = capturar(listar_com_print, contas) == capturar(listar_com_cache, contas, cache)
+    pagina_ok = pagina == sorted(contas, key=lambda conta: conta.saldo, reverse=True)[50:100]
+
+    print(f"Contas: {quantidade}")
+    print(f"print por conta:\t\t{duracao_print * 1000:.1f} ms")
+    print(f"Cache vazio, em blocos:\t\t{duracao_fria * 1000:.1f} ms ({duracao_print / duracao_fria:.1f}x)")
+    print(f"Cache pronto, em blocos:\t{duracao_quente * 1000:.1f} ms ({duracao_print / duracao_quente:.1f}x)")
+    print(f"1% dos saldos alterados:\t{duracao_alterada * 1000:.1f} ms ({duracao_print / duracao_alterada:.1f}x)")
+    print(f"Página 2 por saldo (heapq):\t{duracao_pagina * 1000:.1f} ms")
+    print(f"Saídas iguais:\t\t\t{iguais} | Página correta: {pagina_ok}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#Mede a memória ocupada por conta (cliente + conta corrente + histórico vazio)
+#comparando as classes com __slots__ com as mesmas classes sem __slots__, baseadas em __dict__.
+#
+#O lado sem __slots__ é o próprio módulo carregado de novo com as declarações __slots__
+#trocadas por pass, então os dois lados criam os mesmos atributos e contêineres por conta.
+#
+#Uso: python benchmarks/benchmark_memoria.py [quantidade_de_contas]
+import os
+import re
+import sys
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desafio_date_time_sistema_bancario as com_slots
+
+def carregar_sem_slots(modulo):
+    with open(modulo.__file__, encoding="utf-8") as arquivo:
+        codigo = re.sub(r"^(\s*)__slots__ = .*$", r"\1pass", arquivo.read(), flags=re.MULTILINE)
+
+    copia = types.ModuleType(f"{modulo.__name__}_sem_slots")
+    copia.__file__ = modulo.__file__
+    exec(compile(codigo, modulo.__file__, "exec"), copia.__dict__)
+
+    return copia
+
+def medir(modulo, quantidade):
+    tracemalloc.start()
+
+    contas = []
+    for numero in range(quantidade):
+        cliente = modulo.PessoaFisica("Rua A", f"{numero:011d}", "Cliente", "01/01/1990")
+        conta = modulo.ContaCorrente(numero, cliente)
+        cliente.adicionar_conta(conta)
+        contas.append(conta)
+
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return memoria / quantidade
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sem_slots = carregar_sem_slots(com_slots)
+
+    antes = medir(sem_slots, quantidade)
+    depois = medir(com_slots, quantidade)
+
+    print(f"Contas: {quantidade}")
+    print(f"Com __dict__:\t{antes:.1f} bytes por conta")
+    print(f"Com __slots__:\t{depois:.1f} bytes por conta")
+    print(f"Redução:\t{(1 - depois / antes) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
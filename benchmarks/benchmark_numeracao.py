@@ -0,0 +1,59 @@
+#Abertura de contas em paralelo com o AlocadorNumeros
+#
+#Vários processos abrem contas ao mesmo tempo, cada um com o seu alocador sobre o mesmo arquivo
+#de marca. Mede a vazão para cada tamanho de bloco e confere que nenhum número se repetiu entre
+#os processos e que um alocador novo (reinício) continua acima do maior número entregue.
+#
+#Uso: python benchmarks/benchmark_numeracao.py [contas_por_processo] [processos]
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desafio_date_time_sistema_bancario import ContaCorrente, ContaRegistry, PessoaFisica
+from numeracao import AlocadorNumeros
+
+def abrir_contas(argumentos):
+    caminho, tamanho_bloco, quantidade = argumentos
+    numeros_conta = AlocadorNumeros(caminho, tamanho_bloco)
+    contas = ContaRegistry()
+    cliente = PessoaFisica("Rua A", f"{os.getpid():011d}", "Cliente", "01/01/1990")
+
+    for _ in range(quantidade):
+        conta = ContaCorrente.nova_conta(next(numeros_conta), cliente)
+        contas.adicionar(conta)
+        cliente.adicionar_conta(conta)
+
+    return [conta.numero for conta in contas]
+
+def medir(processos, tamanho_bloco, quantidade):
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "numero_conta")
+
+        with multiprocessing.Pool(processos) as pool:
+            inicio = time.perf_counter()
+            numeros = [numero for parte in pool.map(abrir_contas, [(caminho, tamanho_bloco, quantidade)] * processos)
+                       for numero in parte]
+            duracao = time.perf_counter() - inicio
+
+        unicos = len(set(numeros)) == len(numeros)
+        reinicio_ok = next(AlocadorNumeros(caminho, tamanho_bloco)) > max(numeros)
+
+    return len(numeros) / duracao, unicos, reinicio_ok
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    processos = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+    print(f"Processos: {processos} | Contas por processo: {quantidade}")
+    print(f"{'Bloco':>8}{'Contas/s':>14}{'Únicos':>9}{'Reinício':>10}")
+
+    for tamanho_bloco in (1, 10, 100, 1000):
+        vazao, unicos, reinicio_ok = medir(processos, tamanho_bloco, quantidade)
+        print(f"{tamanho_bloco:>8}{vazao:>14.0f}{str(unicos):>9}{str(reinicio_ok):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#Gerador de carga para o servidor asyncio
+#
+#Abre várias sessões simultâneas. Cada sessão cadastra um cliente e uma conta e depois envia
+#depósitos, saques e extratos, um por vez, medindo a latência de cada resposta.
+#
+#Uso: python benchmarks/carga_servidor.py [--sessoes 1000] [--requisicoes 50] [--host 127.0.0.1 --porta 8888]
+#Sem --host/--porta/--unix, o servidor é iniciado no próprio processo.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor import ServidorBanco
+
+OPERACOES = (
+    {"operacao": "deposito", "valor": 10},
+    {"operacao": "saque", "valor": 5},
+    {"operacao": "extrato"},
+)
+
+async def sessao(indice, conectar, requisicoes, latencias):
+    leitor, escritor = await conectar()
+    cpf = f"{indice:011d}"
+
+    async def enviar(requisicao):
+        inicio = time.perf_counter()
+        escritor.write(json.dumps(requisicao).encode("utf-8") + b"\n")
+        resposta = json.loads(await leitor.readline())
+        latencias.append(time.perf_counter() - inicio)
+        return resposta
+
+    await enviar({"operacao": "cadastrar_cliente", "cpf": cpf, "nome": "Cliente", "endereco": "Rua A", "data_nasc": "01/01/1990"})
+    await enviar({"operacao": "cadastrar_conta", "cpf": cpf})
+
+    for numero in range(requisicoes):
+        await enviar({**OPERACOES[numero % len(OPERACOES)], "cpf": cpf})
+
+    escritor.close()
+    await escritor.wait_closed()
+
+async def executar(opcoes):
+    servidor = None
+
+    if opcoes.caminho_unix:
+        conectar = lambda: asyncio.open_unix_connection(opcoes.caminho_unix)
+    elif opcoes.host:
+        conectar = lambda: asyncio.open_connection(opcoes.host, opcoes.porta)
+    else:
+        servidor = await ServidorBanco().iniciar("127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        conectar = lambda: asyncio.open_connection("127.0.0.1", porta)
+
+    latencias = []
+    inicio = time.perf_counter()
+
+    await asyncio.gather(*(sessao(indice, conectar, opcoes.requisicoes, latencias) for indice in range(opcoes.sessoes)))
+
+    duracao = time.perf_counter() - inicio
+
+    if servidor:
+        servidor.close()
+        await servidor.wait_closed()
+
+    latencias.sort()
+    percentil = lambda fracao: latencias[min(int(fracao * len(latencias)), len(latencias) - 1)] * 1000
+
+    print(f"Sessões:\t{opcoes.sessoes}")
+    print(f"Requisições:\t{len(latencias)}")
+    print(f"Vazão:\t\t{len(latencias) / duracao:.0f} req/s")
+    print(f"Latência:\tp50 {percentil(0.50):.2f} ms | p95 {percentil(0.95):.2f} ms | p99 {percentil(0.99):.2f} ms")
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Gerador de carga do servidor do Banco PC")
+    argumentos.add_argument("--sessoes", type=int, default=1000)
+    argumentos.add_argument("--requisicoes", type=int, default=50)
+    argumentos.add_argument("--host")
+    argumentos.add_argument("--porta", type=int, default=8888)
+    argumentos.add_argument("--unix", dest="caminho_unix")
+    asyncio.run(executar(argumentos.parse_args()))
+
+if __name__ == "__main__":
+    main()
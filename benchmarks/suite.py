@@ -0,0 +1,308 @@
+#Suíte de benchmarks dos caminhos mais usados nas três versões do sistema
+#
+#Cargas, com os tamanhos configuráveis pela linha de comando:
+#  filtrar_clientes        busca por CPF em um cadastro com N clientes
+#  sacar_depositar         ContaCorrente.sacar/depositar em contas com históricos de 10 a 1M transações
+#  verificar_limites       verificação dos limites de um saque: Politica.verificar com os estados de
+#                          dia e janela na versão date_time, contador de saques por tipo nas outras
+#  gerador_transacao       filtro do extrato por tipo sobre o histórico inteiro
+#  listar_contas           IteradorConta + escrita em blocos, com a saída descartada
+#Cargas que não existem em uma versão (ex.: listagem na versão POO) são puladas.
+#
+#Cada medição executa a carga `--repeticoes` vezes e guarda o menor tempo e a mediana por
+#operação. Os resultados vão para um arquivo JSON (--saida) e, se houver baseline, são comparados
+#com ela: uma carga cujo menor tempo por operação passa da baseline em mais de `--tolerancia` é
+#uma regressão e o processo termina com código 1, para barrar o deploy.
+#
+#Uso:
+#  python benchmarks/suite.py --salvar-baseline            #grava benchmarks/baseline.json
+#  python benchmarks/suite.py                              #mede e compara com a baseline
+#  python benchmarks/suite.py --rapido --variantes date_time
+import argparse
+import gc
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+VARIANTES = {
+    "poo": "desafio_poo_sistema_bancario",
+    "decoradores": "desafio_decoradores_sistema_bancario",
+    "date_time": "desafio_date_time_sistema_bancario",
+}
+
+#Limites altos para que os saques e depósitos medidos sejam aceitos, mantendo as regras com
+#estado (dia e janela) que a versão date_time verifica a cada operação
+POLITICAS_BENCHMARK = {
+    "ContaCorrente": {
+        "saldo_inicial": 50_000,
+        "regras": [
+            {"regra": "quantidade_dia", "limite": 10**12},
+            {"regra": "valor_maximo_operacao", "operacoes": ["saque"], "centavos": 50_000},
+            {"regra": "valor_janela", "operacoes": ["saque"], "segundos": 3600, "centavos": 10**15},
+        ],
+    },
+}
+
+TAMANHOS_PADRAO = {
+    "clientes": [1_000, 100_000],
+    "historicos": [10, 1_000, 100_000, 1_000_000],
+    "contas": [10_000, 100_000],
+}
+
+TAMANHOS_RAPIDO = {
+    "clientes": [1_000],
+    "historicos": [10, 10_000],
+    "contas": [1_000],
+}
+
+def medir(executar, operacoes, repeticoes, duracao_minima=0.05):
+    #Executa uma vez para aquecer (caches, estados das regras) e usa esse tempo para repetir as
+    #cargas curtas até cada medição durar pelo menos `duracao_minima`, diminuindo o ruído
+    inicio = time.perf_counter()
+    executar()
+    voltas = max(1, math.ceil(duracao_minima / max(time.perf_counter() - inicio, 1e-9)))
+
+    tempos = []
+    coletor_ativo = gc.isenabled()
+    gc.disable()
+
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+
+            for _ in range(voltas):
+                executar()
+
+            tempos.append((time.perf_counter() - inicio) / (operacoes * voltas))
+    finally:
+        if coletor_ativo:
+            gc.enable()
+
+    return {
+        "operacoes": operacoes * voltas,
+        "repeticoes": repeticoes,
+        "minimo": min(tempos),
+        "mediana": statistics.median(tempos),
+    }
+
+def criar_cliente(modulo, indice):
+    return modulo.PessoaFisica("Rua A", f"{indice:011d}", f"Cliente {indice}", "01/01/1990")
+
+def criar_conta(modulo, numero, cliente):
+    if hasattr(modulo, "contexto_padrao"):
+        conta = modulo.ContaCorrente(numero, cliente)
+    else:
+        #Nas versões sem políticas o limite de saques fica no construtor
+        conta = modulo.ContaCorrente(numero, cliente, limite_saques=sys.maxsize)
+
+    cliente.adicionar_conta(conta)
+    return conta
+
+def preencher_historico(modulo, conta, tamanho):
+    historico = conta.historico
+    transacoes = (modulo.Deposito(100), modulo.Saque(100))
+
+    if hasattr(modulo, "contexto_padrao"):
+        #Um segundo entre as transações, terminando agora, como um histórico real em ordem de data
+        inicio = datetime.now() - timedelta(seconds=tamanho)
+
+        for indice in range(tamanho):
+            historico.adicionar_transacao(transacoes[indice % 2], inicio + timedelta(seconds=indice), conta.saldo)
+    else:
+        for indice in range(tamanho):
+            historico.adicionar_transacao(transacoes[indice % 2])
+
+def cargas_clientes(modulo, tamanhos, sorteio):
+    for quantidade in tamanhos["clientes"]:
+        clientes = modulo.ClienteRegistry()
+
+        for indice in range(quantidade):
+            clientes.adicionar(criar_cliente(modulo, indice))
+
+        #Metade das buscas encontra o cliente, metade não, com o CPF formatado como no menu
+        consultas = [
+            f"{indice:011d}" if indice % 2 else f"{sorteio.randrange(quantidade, 2 * quantidade):011d}"
+            for indice in (sorteio.randrange(quantidade) for _ in range(10_000))
+        ]
+        consultas = [f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" for cpf in consultas]
+
+        def executar(filtrar_clientes=modulo.filtrar_clientes, clientes=clientes, consultas=consultas):
+            for cpf in consultas:
+                filtrar_clientes(cpf, clientes)
+
+        yield "filtrar_clientes", {"clientes": quantidade}, executar, len(consultas)
+
+def cargas_historico(modulo, tamanhos, sorteio):
+    for tamanho in tamanhos["historicos"]:
+        conta = criar_conta(modulo, 1, criar_cliente(modulo, 1))
+        preencher_historico(modulo, conta, tamanho)
+        parametros = {"historico": tamanho}
+
+        def sacar_depositar(conta=conta):
+            for _ in range(20_000):
+                conta.depositar(100)
+                conta.sacar(100)
+
+        yield "sacar_depositar", parametros, sacar_depositar, 40_000
+
+        historico = conta.historico
+
+        if hasattr(modulo, "contexto_padrao"):
+            #Os estados das regras já foram preenchidos pelos saques e depósitos medidos acima
+            def verificar(politica=conta.politica, conta=conta, instante=datetime.now().timestamp()):
+                for _ in range(100_000):
+                    politica.verificar(conta.estados_limites, "saque", 100, instante, conta._transacoes_recentes)
+        else:
+            def verificar(quantidade_transacoes=historico.quantidade_transacoes):
+                for _ in range(100_000):
+                    quantidade_transacoes("Saque")
+
+        yield "verificar_limites", parametros, verificar, 100_000
+
+        if hasattr(modulo, "gerador_transacao"):
+            def filtrar_extrato(gerador_transacao=modulo.gerador_transacao, transacoes=historico.transacoes):
+                for _ in gerador_transacao(transacoes, "Saque"):
+                    pass
+
+            yield "gerador_transacao", parametros, filtrar_extrato, max(tamanho, 1)
+
+def cargas_listagem(modulo, tamanhos, sorteio):
+    if not hasattr(modulo, "IteradorConta"):
+        return
+
+    for quantidade in tamanhos["contas"]:
+        contas = modulo.ContaRegistry()
+
+        for numero in range(1, quantidade + 1):
+            contas.adicionar(criar_conta(modulo, numero, criar_cliente(modulo, numero)))
+
+        def listar(contas=contas):
+            with open(os.devnull, "w", encoding="utf-8") as descarte, redirect_stdout(descarte):
+                modulo.escrever_em_blocos(f"{linha}\n" for linha in modulo.IteradorConta(contas, contas.linhas))
+
+        yield "listar_contas", {"contas": quantidade}, listar, quantidade
+
+CARGAS = (cargas_clientes, cargas_historico, cargas_listagem)
+
+def executar_variante(variante, tamanhos, repeticoes, semente):
+    modulo = importlib.import_module(VARIANTES[variante])
+    sorteio = random.Random(semente)
+    resultados = {}
+
+    if hasattr(modulo, "contexto_padrao"):
+        modulo.contexto_padrao.motor_politicas.definir(POLITICAS_BENCHMARK)
+
+    for cargas in CARGAS:
+        for nome, parametros, executar, operacoes in cargas(modulo, tamanhos, sorteio):
+            chave = "/".join([variante, nome] + [f"{campo}={valor}" for campo, valor in parametros.items()])
+            resultados[chave] = medir(executar, operacoes, repeticoes)
+            print(f"{chave:<55}{resultados[chave]['minimo'] * 1e6:>12.3f} µs/op", flush=True)
+
+    return resultados
+
+def comparar(resultados, baseline, tolerancia):
+    #Devolve as chaves que ficaram mais lentas que a baseline além da tolerância
+    regressoes = []
+
+    print(f"\n{'Carga':<55}{'Atual':>12}{'Baseline':>12}{'Variação':>10}")
+
+    for chave, resultado in resultados.items():
+        anterior = baseline.get(chave)
+
+        if anterior is None:
+            print(f"{chave:<55}{resultado['minimo'] * 1e6:>12.3f}{'-':>12}{'nova':>10}")
+            continue
+
+        variacao = resultado["minimo"] / anterior["minimo"] - 1
+        marca = ""
+
+        if variacao > tolerancia:
+            regressoes.append(chave)
+            marca = "  REGRESSÃO"
+
+        print(f"{chave:<55}{resultado['minimo'] * 1e6:>12.3f}{anterior['minimo'] * 1e6:>12.3f}{variacao:>+10.1%}{marca}")
+
+    return regressoes
+
+def ler_json(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+def gravar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+        arquivo.write("\n")
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Suíte de benchmarks do Banco PC")
+    argumentos.add_argument("--variantes", nargs="+", choices=sorted(VARIANTES), default=list(VARIANTES))
+    argumentos.add_argument("--rapido", action="store_true", help="tamanhos pequenos, para conferir a suíte")
+    argumentos.add_argument("--clientes", type=int, nargs="+")
+    argumentos.add_argument("--historicos", type=int, nargs="+")
+    argumentos.add_argument("--contas", type=int, nargs="+")
+    argumentos.add_argument("--repeticoes", type=int, default=5)
+    argumentos.add_argument("--semente", type=int, default=42)
+    argumentos.add_argument("--saida", default=os.path.join(DIRETORIO, "resultados.json"))
+    argumentos.add_argument("--baseline", default=os.path.join(DIRETORIO, "baseline.json"))
+    argumentos.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    argumentos.add_argument("--tolerancia", type=float, default=0.2, help="piora aceita em relação à baseline (0.2 = 20%%)")
+    opcoes = argumentos.parse_args()
+
+    tamanhos = dict(TAMANHOS_RAPIDO if opcoes.rapido else TAMANHOS_PADRAO)
+
+    for campo in tamanhos:
+        if getattr(opcoes, campo):
+            tamanhos[campo] = getattr(opcoes, campo)
+
+    resultados = {}
+
+    for variante in opcoes.variantes:
+        resultados.update(executar_variante(variante, tamanhos, opcoes.repeticoes, opcoes.semente))
+
+    dados = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processadores": os.cpu_count(),
+        "tamanhos": tamanhos,
+        "repeticoes": opcoes.repeticoes,
+        "resultados": resultados,
+    }
+    gravar_json(opcoes.saida, dados)
+    print(f"\nResultados gravados em {opcoes.saida}")
+
+    if opcoes.salvar_baseline:
+        gravar_json(opcoes.baseline, dados)
+        print(f"Baseline gravada em {opcoes.baseline}")
+        return
+
+    if not os.path.exists(opcoes.baseline):
+        print("Sem baseline para comparar; use --salvar-baseline para gravar uma.")
+        return
+
+    regressoes = comparar(resultados, ler_json(opcoes.baseline)["resultados"], opcoes.tolerancia)
+
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima de {opcoes.tolerancia:.0%}:")
+
+        for chave in regressoes:
+            print(f"  {chave}")
+
+        sys.exit(1)
+
+    print("\nSem regressões.")
+
+if __name__ == "__main__":
+    main()
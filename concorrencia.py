@@ -0,0 +1,84 @@
+#Processamento concorrente de transações com travas por conta
+#
+#Conta.sacar lê o saldo e depois o altera, e ContaCorrente consulta a quantidade de transações
+#do dia antes de registrar a nova. Para que duas threads não intercalem essas etapas na mesma
+#conta, Transacao.registrar é executado sob uma trava escolhida pelo número da conta. As travas
+#são distribuídas em faixas (um número fixo de travas compartilhadas), então a memória não
+#cresce com a quantidade de contas.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+class TravasPorConta:
+    def __init__(self, quantidade=64):
+        self._travas = tuple(threading.Lock() for _ in range(quantidade))
+
+    def trava(self, numero_conta):
+        return self._travas[hash(numero_conta) % len(self._travas)]
+
+class TravaCompartilhada:
+    #Várias threads podem estar na parte compartilhada ao mesmo tempo (transações e cadastros); a
+    #exclusiva (cópia do estado para o snapshot) impede novas entradas e espera as atuais terminarem.
+    #A parte compartilhada não pode ser aninhada: com uma exclusiva esperando, a segunda entrada travaria.
+    def __init__(self):
+        #Lock simples em vez do RLock padrão da Condition: entrar e sair são o caminho de cada transação
+        self._condicao = threading.Condition(threading.Lock())
+        self._compartilhadas = 0
+        self._exclusiva = False
+
+    @contextmanager
+    def compartilhada(self):
+        with self._condicao:
+            while self._exclusiva:
+                self._condicao.wait()
+
+            self._compartilhadas += 1
+
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._compartilhadas -= 1
+
+                if self._exclusiva and not self._compartilhadas:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def exclusiva(self):
+        with self._condicao:
+            while self._exclusiva:
+                self._condicao.wait()
+
+            self._exclusiva = True
+
+            while self._compartilhadas:
+                self._condicao.wait()
+
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._exclusiva = False
+                self._condicao.notify_all()
+
+class ExecutorTransacoes:
+    def __init__(self, max_threads=8, quantidade_travas=64):
+        self._travas = TravasPorConta(quantidade_travas)
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="transacoes")
+
+    def executar(self, cliente, conta, transacao):
+        with self._travas.trava(conta.numero):
+            return cliente.realizar_transacao(conta, transacao)
+
+    def submeter(self, cliente, conta, transacao):
+        #Retorna um Future com o ResultadoOperacao da transação
+        return self._executor.submit(self.executar, cliente, conta, transacao)
+
+    def fechar(self, esperar=True):
+        self._executor.shutdown(wait=esperar)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
@@ -1,9 +1,95 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, date
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime, date, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from enum import Enum
+from itertools import islice
+from operator import index
+
+import heapq
+import os
+import sys
+import weakref
+from collections import OrderedDict
+
+import metricas
+from armazenamento_sqlite import ArmazenamentoSQLite
+from concorrencia import TravaCompartilhada
+from diario import CLIENTE, CONTA, TRANSACAO, DiarioTransacoes
+from instrumentacao import decorador_log
+from numeracao import AlocadorNumeros
+from politicas import MotorPoliticas
+
+class ResultadoOperacao(Enum):
+    #Resultado de um saque ou depósito, avaliado como verdadeiro apenas em caso de sucesso
+    SUCESSO = "sucesso"
+    VALOR_INVALIDO = "valor_invalido"
+    SALDO_INSUFICIENTE = "saldo_insuficiente"
+    LIMITE_VALOR_EXCEDIDO = "limite_valor_excedido"
+    LIMITE_TRANSACOES_DIA_EXCEDIDO = "limite_transacoes_dia_excedido"
+    LIMITE_VALOR_DIA_EXCEDIDO = "limite_valor_dia_excedido"
+    LIMITE_JANELA_EXCEDIDO = "limite_janela_excedido"
+
+    def __bool__(self):
+        return self is ResultadoOperacao.SUCESSO
+
+#Limites usados sem arquivo de políticas (o politicas.json do repositório tem os mesmos valores)
+POLITICAS_PADRAO = {
+    "ContaCorrente": {
+        "saldo_inicial": 50_000,
+        "regras": [
+            {"regra": "quantidade_dia", "limite": 2},
+            {"regra": "valor_maximo_operacao", "operacoes": ["saque"], "centavos": 50_000},
+        ],
+    },
+}
+
+class ContextoBanco:
+    #Ouvintes e políticas de limites de um banco. Cada Banco tem o seu; contas e cadastros guardam
+    #o contexto do banco que os criou, assim bancos diferentes não gravam no diário nem usam as
+    #políticas um do outro.
+    def __init__(self, motor_politicas=None):
+        #Funções chamadas a cada cliente, conta ou transação registrada (ex.: diário persistente)
+        self.ouvintes = []
+        #Políticas de limites por tipo de conta, recarregadas quando o arquivo carregado muda
+        self.motor_politicas = motor_politicas if motor_politicas is not None else MotorPoliticas(POLITICAS_PADRAO)
+        #Transações e cadastros alteram o estado e notificam os ouvintes na parte compartilhada; a cópia
+        #do estado para o snapshot usa a exclusiva, assim nenhuma alteração fica entre a cópia e o diário
+        self.trava_estado = TravaCompartilhada()
+
+    def notificar(self, evento, *dados):
+        for ouvinte in self.ouvintes:
+            ouvinte(evento, *dados)
+
+#Contexto de contas e cadastros criados fora de um Banco (scripts, benchmarks): sem ouvintes
+contexto_padrao = ContextoBanco()
+
+#Valores em dinheiro são inteiros em centavos: somas e subtrações exatas, sem o desvio acumulado do float
+def para_centavos(valor):
+    #Converte um valor em reais (texto, int, float ou Decimal) para centavos, arredondando o meio centavo para cima
+    if isinstance(valor, int):
+        return valor * 100
+
+    try:
+        return int((Decimal(str(valor).strip()) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {valor!r}")
+
+#Maior valor ou saldo aceito: inteiro de 64 bits, como gravado no diário, no SQLite e no HistoricoColunar
+CENTAVOS_MAXIMO = 2 ** 63 - 1
+
+def formatar_reais(centavos):
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"{sinal}{reais}.{resto:02d}"
 
 class Transacao(ABC):
+    __slots__ = ()
+
     @abstractmethod
-    def registrar(self, conta):
+    def registrar(self, conta, data=None):
         pass
 
     @property
@@ -12,77 +98,338 @@ class Transacao(ABC):
         pass
 
 class Deposito(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor):
-        self._valor = float(valor)
+        #valor em centavos, use para_centavos para converter um valor em reais
+        self._valor = index(valor)
     
-    def registrar(self, conta):
-        sucesso_transacao = conta.depositar(self.valor)
+    @metricas.medir
+    def registrar(self, conta, data=None):
+        #data só é informada para transações com data própria (ex.: lote de transações); sem ela, agora
+        with conta.contexto.trava_estado.compartilhada():
+            sucesso_transacao = conta.depositar(self.valor, data)
+
+            if sucesso_transacao:
+                data = conta.historico.adicionar_transacao(self, data, conta.saldo)
+                conta.contexto.notificar("transacao", conta, self, data)
 
-        if sucesso_transacao:
-            conta.historico.adicionar_transacao(self)
+        return sucesso_transacao
     
     @property
     def valor(self):
         return self._valor
 
 class Saque(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor):
-        self._valor = float(valor)
+        #valor em centavos, use para_centavos para converter um valor em reais
+        self._valor = index(valor)
 
     @property
     def valor(self):
         return self._valor
     
-    def registrar(self, conta):
-        sucesso_transacao = conta.sacar(self.valor)
+    @metricas.medir
+    def registrar(self, conta, data=None):
+        with conta.contexto.trava_estado.compartilhada():
+            sucesso_transacao = conta.sacar(self.valor, data)
+
+            if sucesso_transacao:
+                data = conta.historico.adicionar_transacao(self, data, conta.saldo)
+                conta.contexto.notificar("transacao", conta, self, data)
 
-        if sucesso_transacao:
-            conta.historico.adicionar_transacao(self)
+        return sucesso_transacao
 
 class Historico:
+    __slots__ = ("_transacoes", "_instantes", "_conhecido_desde")
+
     def __init__(self):
-        self._transacoes = []
+        #A lista e o array são criados na primeira transação; até lá as contas sem movimento
+        #compartilham a tupla vazia
+        self._transacoes = ()
+        #Data de cada transação em segundos, em ordem crescente (as transações entram em ordem de data)
+        self._instantes = ()
+        #Instante a partir do qual o histórico está completo; None quando contém todas as transações
+        #(contas restauradas de um snapshot só têm as transações posteriores a ele)
+        self._conhecido_desde = None
     
     @property
     def transacoes(self):
         return self._transacoes
     
-    def adicionar_transacao(self, transacao):
-        self.transacoes.append(
+    def adicionar_transacao(self, transacao, data, saldo):
+        #data None é o momento atual; é informada ao reaplicar transações já registradas (ex.: recuperação
+        #do diário) ou em transações com data própria. saldo é o saldo da conta logo após a transação
+        if data is None:
+            data = datetime.now()
+
+        self._armazenar(transacao.__class__.__name__, transacao.valor, data, saldo)
+
+        return data
+
+    def _posicoes_entre(self, inicio, fim):
+        #Primeira e última (exclusiva) posição com inicio <= data < fim, por busca binária nas datas
+        primeira = 0 if inicio is None else bisect_left(self._instantes, inicio.timestamp())
+        ultima = len(self._instantes) if fim is None else bisect_left(self._instantes, fim.timestamp())
+
+        return primeira, max(primeira, ultima)
+
+    def transacoes_entre(self, inicio=None, fim=None):
+        #Transações com inicio <= data < fim
+        return FatiaTransacoes(self.transacoes, *self._posicoes_entre(inicio, fim))
+
+    def transacoes_do_tipo(self, tipo, inicio=None, fim=None):
+        #Transações do tipo (ex.: "Saque") com inicio <= data < fim, em ordem de data
+        return [transacao for transacao in self.transacoes_entre(inicio, fim) if transacao["tipo"] == tipo]
+
+    def cobre(self, data):
+        return self._conhecido_desde is None or data.timestamp() >= self._conhecido_desde
+
+    def ultimo_instante(self):
+        #Data em segundos da transação mais recente, ou None se o histórico está vazio
+        return self._instantes[-1] if self._instantes else None
+
+    def saldo_em(self, data):
+        #Saldo após a última transação com data <= data informada, ou None se o histórico está vazio
+        if not self._instantes:
+            return None
+
+        indice = bisect_right(self._instantes, data.timestamp())
+
+        if indice > 0:
+            return self.transacoes[indice - 1]["saldo"]
+
+        #Antes da primeira transação: desfaz o efeito dela sobre o saldo
+        primeira = self.transacoes[0]
+
+        if primeira["tipo"] == Deposito.__name__:
+            return primeira["saldo"] - primeira["valor"]
+
+        return primeira["saldo"] + primeira["valor"]
+
+    def _armazenar(self, tipo, valor, data, saldo):
+        if not self._instantes:
+            self._transacoes = []
+            self._instantes = array("d")
+
+        self._transacoes.append(
             {
-                "tipo": transacao.__class__.__name__,
-                "valor": transacao.valor,
-                "data": datetime.now(),
+                "tipo": tipo,
+                "valor": valor,
+                "data": data,
+                "saldo": saldo,
             }
         )
+        self._instantes.append(data.timestamp())
+
+class FatiaTransacoes(Sequence):
+    #Visão de um intervalo contínuo do histórico, sem copiar as transações
+    def __init__(self, transacoes, inicio, fim):
+        self._transacoes = transacoes
+        self._inicio = inicio
+        self._fim = fim
+
+    def __len__(self):
+        return self._fim - self._inicio
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+
+        if indice < 0:
+            indice += len(self)
+
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+
+        return self._transacoes[self._inicio + indice]
+
+    def __iter__(self):
+        for indice in range(self._inicio, self._fim):
+            yield self._transacoes[indice]
+
+class TransacoesColunares(Sequence):
+    #Visão somente leitura sobre as colunas do HistoricoColunar, monta cada transação apenas quando acessada
+    def __init__(self, historico):
+        self._historico = historico
+
+    def __len__(self):
+        return len(self._historico._tipos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+
+        historico = self._historico
+
+        return {
+            "tipo": HistoricoColunar.TIPOS[historico._tipos[indice]],
+            "valor": historico._centavos[indice],
+            "data": datetime.fromtimestamp(historico._instantes[indice]),
+            "saldo": historico._saldos[indice],
+        }
+
+class HistoricoColunar(Historico):
+    #Guarda cada transação em colunas compactas: tipo (1 byte), valor e saldo em centavos e data em segundos (8 bytes cada)
+    __slots__ = ("_tipos", "_centavos", "_saldos")
+
+    TIPOS = (Deposito.__name__, Saque.__name__)
+    CODIGOS = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+    def __init__(self):
+        super().__init__()
+        #Como no Historico, os arrays são criados na primeira transação
+        self._tipos = self._centavos = self._saldos = ()
+
+    @property
+    def transacoes(self):
+        return TransacoesColunares(self)
+
+    def transacoes_do_tipo(self, tipo, inicio=None, fim=None):
+        #Compara a coluna de tipos e monta apenas as transações do tipo pedido
+        codigo = self.CODIGOS.get(tipo)
+        transacoes = self.transacoes
+        tipos = self._tipos
+
+        return [transacoes[indice] for indice in range(*self._posicoes_entre(inicio, fim)) if tipos[indice] == codigo]
+
+    def _armazenar(self, tipo, valor, data, saldo):
+        if not self._instantes:
+            self._tipos = array("b")
+            self._centavos = array("q")
+            self._saldos = array("q")
+            self._instantes = array("d")
+
+        self._tipos.append(self.CODIGOS[tipo])
+        self._centavos.append(valor)
+        self._saldos.append(saldo)
+        self._instantes.append(data.timestamp())
 
 class Cliente:
+    #__weakref__ permite que o ClienteRegistrySQLite reencontre clientes ainda em uso fora do cache
+    __slots__ = ("endereco", "contas", "__weakref__")
+
     def __init__(self, endereco):
         self.endereco = endereco
-        self.contas = []
+        #Contas do cliente por (agência, número)
+        self.contas = {}
 
 
-    def realizar_transacao(self, conta, transacao):
-        transacao.registrar(conta)
+    def realizar_transacao(self, conta, transacao, data=None):
+        return transacao.registrar(conta, data)
 
     def adicionar_conta(self, conta):
-        self.contas.append(conta)
+        self.contas[(conta.agencia, conta.numero)] = conta
 
 class PessoaFisica(Cliente):
+    __slots__ = ("cpf", "nome", "data_nasc")
+
     def __init__(self, endereco, cpf, nome, data_nasc):
-        self. cpf = cpf
+        self.cpf = cpf
         self.nome = nome
         self.data_nasc = data_nasc
 
         super().__init__(endereco)
 
+class ClienteRegistry:
+    #Índice de clientes por CPF normalizado, substitui a busca linear na lista de clientes
+    def __init__(self, contexto=None):
+        self._clientes = {}
+        self._contexto = contexto if contexto is not None else contexto_padrao
+
+    @staticmethod
+    def normalizar_cpf(cpf):
+        #Mantém apenas os dígitos, assim "111.222.333-44" e "11122233344" são o mesmo CPF
+        return "".join(caractere for caractere in str(cpf) if caractere.isdigit())
+
+    def buscar(self, cpf):
+        return self._clientes.get(self.normalizar_cpf(cpf))
+
+    def adicionar(self, cliente):
+        #setdefault verifica e insere em uma única operação, evitando cadastro duplicado
+        cpf = self.normalizar_cpf(cliente.cpf)
+
+        with self._contexto.trava_estado.compartilhada():
+            adicionado = self._clientes.setdefault(cpf, cliente) is cliente
+
+            if adicionado:
+                self._contexto.notificar("cliente", cliente)
+
+        return adicionado
+
+    def __contains__(self, cpf):
+        return self.normalizar_cpf(cpf) in self._clientes
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def __iter__(self):
+        return iter(self._clientes.values())
+
+#Agência das contas abertas pelo sistema
+AGENCIA_PADRAO = "0001"
+
+class ContaRegistry:
+    #Índice de contas por (agência, número), mantido pelo cadastro de contas
+    def __init__(self):
+        self._contas = {}
+        #Ordem de cadastro, para listar e acessar por posição
+        self._ordem = []
+        #Linhas da listagem destas contas
+        self.linhas = CacheLinhasConta()
+        self._maior_numero = 0
+
+    def buscar(self, numero, agencia=AGENCIA_PADRAO):
+        return self._contas.get((agencia, numero))
+
+    def adicionar(self, conta):
+        #setdefault verifica e insere em uma única operação, evitando número de conta duplicado
+        if self._contas.setdefault((conta.agencia, conta.numero), conta) is not conta:
+            return False
+
+        self._ordem.append(conta)
+        self._maior_numero = max(self._maior_numero, conta.numero)
+        return True
+
+    def maior_numero(self):
+        return self._maior_numero
+
+    def __contains__(self, chave):
+        return chave in self._contas
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def __iter__(self):
+        return iter(self._ordem)
+
+    def __getitem__(self, posicao):
+        return self._ordem[posicao]
+
 class Conta:
-    def __init__(self, numero, cliente):
-        self._saldo = 500
+    #Sem __dict__ por instância, reduz a memória ocupada por milhões de contas
+    __slots__ = ("_saldo", "_numero", "_agencia", "_cliente", "_historico", "_contexto", "_aberta_em")
+
+    #Classe usada para o histórico de novas contas. As colunas do HistoricoColunar ocupam menos memória
+    #e são exportadas pelo módulo analise sem montar cada transação; Historico guarda os dicionários
+    classe_historico = HistoricoColunar
+
+    #Saldo inicial em centavos dos tipos de conta sem política configurada
+    saldo_inicial = 50_000
+
+    def __init__(self, numero, cliente, contexto=None):
+        self._contexto = contexto if contexto is not None else contexto_padrao
+        #Saldo em centavos
+        politica = self._contexto.motor_politicas.politica(self.__class__.__name__)
+        self._saldo = politica.saldo_inicial if politica else self.saldo_inicial
         self._numero = numero
-        self._agencia = "0001"
+        self._agencia = AGENCIA_PADRAO
         self._cliente = cliente
-        self._historico = Historico()
+        self._historico = self.classe_historico()
+        #Instante da abertura em segundos; None nas contas restauradas de registros que não o guardavam
+        self._aberta_em = datetime.now().timestamp()
     
     @property
     def saldo(self):
@@ -104,76 +451,120 @@ class Conta:
     def historico(self):
         return self._historico
 
+    @property
+    def contexto(self):
+        return self._contexto
+
+    @property
+    def aberta_em(self):
+        return self._aberta_em
+
+    def saldo_em(self, data):
+        #Consulta o saldo registrado no histórico, sem reaplicar as transações. None quando a data
+        #é anterior à abertura da conta ou ao período coberto pelo histórico (saldo desconhecido)
+        if self._aberta_em is not None and data.timestamp() < self._aberta_em:
+            return None
+
+        if not self.historico.cobre(data):
+            return None
+
+        saldo = self.historico.saldo_em(data)
+        return self.saldo if saldo is None else saldo
+
     #Método de fábrica para criar uma instância de Conta
     @classmethod
-    def nova_conta(cls, numero, cliente):
-        return cls(numero, cliente)
+    def nova_conta(cls, numero, cliente, contexto=None):
+        return cls(numero, cliente, contexto)
     
-    def sacar(self, valor):
+    def sacar(self, valor, data=None):
+        #data é o momento da operação, usado pelos limites da ContaCorrente
         saldo = self.saldo
         excedeu_saldo = valor > saldo
 
         if excedeu_saldo:
-            print("\n@@@ Operação falhou! Você não tem saldo suficiente. @@@\n")
+            return ResultadoOperacao.SALDO_INSUFICIENTE
         
         elif valor > 0:
             self._saldo -= valor
-            print("\n=== Saque realizado com sucesso! ===\n")
             
-            return True
+            return ResultadoOperacao.SUCESSO
         
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@\n")
-            
-            return False
+            return ResultadoOperacao.VALOR_INVALIDO
 
-    def depositar(self, valor):
-        if valor > 0:
+    def depositar(self, valor, data=None):
+        #O saldo resultante é conferido antes de alterar a conta, para caber no diário e no SQLite
+        if 0 < valor <= CENTAVOS_MAXIMO - self.saldo:
             self._saldo += valor
-            print("\n=== Depósito realizado com sucesso! ===\n")
 
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@\n")
-            return False
+            return ResultadoOperacao.VALOR_INVALIDO
         
-        return True
+        return ResultadoOperacao.SUCESSO
 
 class ContaCorrente(Conta):
-    def __init__(self, numero, cliente, limite=500):
-        self._limite = limite
-        self._limite_transacoes_dia = 2
-        super().__init__(numero, cliente)
+    __slots__ = ("_estados_limites",)
 
-    def sacar(self, valor):
-        #Busca a quantidade de transações do dia
-        numero_transacoes = contar_transacoes_dia(self.historico.transacoes)
+    def __init__(self, numero, cliente, contexto=None):
+        #Criado na primeira operação com política (ver estados_limites)
+        self._estados_limites = None
+        super().__init__(numero, cliente, contexto)
 
-        excedeu_limite = valor > self._limite
-        excedeu_limite_transacoes_dia = numero_transacoes >= self._limite_transacoes_dia
-        
-        if excedeu_limite_transacoes_dia:
-            print("\n@@@ Operação falhou! A quantidade de transações diárias foi excedida! @@@\n")
+    @property
+    def estados_limites(self):
+        #Estado de cada regra de limite da política (contadores do dia, janelas), pela chave da regra
+        if self._estados_limites is None:
+            self._estados_limites = {}
 
-        elif excedeu_limite:
-            print("\n@@@ Operação falhou! O valor limite para saque foi excedido! @@@\n")
+        return self._estados_limites
 
-        else:
-            return super().sacar(valor)
+    @property
+    def politica(self):
+        return self._contexto.motor_politicas.politica(self.__class__.__name__)
 
-        return False
-    
-    def depositar(self, valor):
-        #Busca a quantidade de transações do dia
-        numero_transacoes = contar_transacoes_dia(self.historico.transacoes)
-        excedeu_limite_transacoes_dia = numero_transacoes >= self._limite_transacoes_dia
+    def _transacoes_recentes(self, desde):
+        #Usado uma única vez por regra, para preencher o estado de uma regra nova ou de uma conta restaurada
+        for transacao in self.historico.transacoes_entre(datetime.fromtimestamp(desde)):
+            yield transacao["tipo"].lower(), transacao["valor"], transacao["data"].timestamp()
 
-        if excedeu_limite_transacoes_dia:
-            print("\n@@@ Operação falhou! A quantidade de transações diárias foi excedida! @@@\n")
-        
-        else:
-            return super().depositar(valor)
-        
-        return False
+    def _aplicar(self, operacao, valor, aplicar, data):
+        politica = self.politica
+
+        if politica is None:
+            return aplicar(valor)
+
+        instante = (datetime.now() if data is None else data).timestamp()
+        motivo = politica.verificar(self.estados_limites, operacao, valor, instante, self._transacoes_recentes)
+
+        if motivo:
+            return ResultadoOperacao(motivo)
+
+        resultado = aplicar(valor)
+
+        if resultado:
+            politica.registrar(self.estados_limites, operacao, valor, instante)
+
+        return resultado
+
+    def reaplicar_limites(self, transacao, instante):
+        #Conta nos limites uma transação já aceita que está sendo reaplicada (recuperação do diário)
+        politica = self.politica
+
+        if politica is not None:
+            politica.registrar(self.estados_limites, transacao.__class__.__name__.lower(), transacao.valor, instante)
+
+    def copiar_estados_limites(self):
+        #Cópia dos estados das regras, gravada no snapshot para que os limites continuem após reiniciar
+        if not self._estados_limites:
+            return {}
+
+        return {chave: estado.copia() for chave, estado in self._estados_limites.items()}
+
+    def sacar(self, valor, data=None):
+        return self._aplicar("saque", valor, super().sacar, data)
+    
+    def depositar(self, valor, data=None):
+        return self._aplicar("deposito", valor, super().depositar, data)
     
     def __str__(self):
         return f"""\
@@ -181,60 +572,187 @@ class ContaCorrente(Conta):
             C/C:\t\t{self.numero}
             Titular:\t{self.cliente.nome}
         """
-class IteradorConta:
-    def __init__(self, contas):
-        self._contas = contas
-        self.contador = 0
 
-    def __iter__(self):
-        return self
+class ApresentadorConsole:
+    #Exibe no console o resultado das transações do menu interativo
+    MENSAGENS_SUCESSO = {
+        Deposito.__name__: "\n=== Depósito realizado com sucesso! ===\n",
+        Saque.__name__: "\n=== Saque realizado com sucesso! ===\n",
+    }
+
+    MENSAGENS_FALHA = {
+        ResultadoOperacao.VALOR_INVALIDO: "\n@@@ Operação falhou! O valor informado é inválido. @@@\n",
+        ResultadoOperacao.SALDO_INSUFICIENTE: "\n@@@ Operação falhou! Você não tem saldo suficiente. @@@\n",
+        ResultadoOperacao.LIMITE_VALOR_EXCEDIDO: "\n@@@ Operação falhou! O valor limite para saque foi excedido! @@@\n",
+        ResultadoOperacao.LIMITE_TRANSACOES_DIA_EXCEDIDO: "\n@@@ Operação falhou! A quantidade de transações diárias foi excedida! @@@\n",
+        ResultadoOperacao.LIMITE_VALOR_DIA_EXCEDIDO: "\n@@@ Operação falhou! O valor diário para a operação foi excedido! @@@\n",
+        ResultadoOperacao.LIMITE_JANELA_EXCEDIDO: "\n@@@ Operação falhou! O limite de operações no período foi excedido! Tente mais tarde. @@@\n",
+    }
+
+    def exibir(self, transacao, resultado):
+        if resultado:
+            print(self.MENSAGENS_SUCESSO[transacao.__class__.__name__])
+        else:
+            print(self.MENSAGENS_FALHA[resultado])
 
-    def __next__(self):
-        try:
-            conta = self._contas[self.contador]
-            self.contador += 1
-            return f"""\
+class ApresentadorSilencioso:
+    #Não produz saída, usado em lote e em servidores
+    def exibir(self, transacao, resultado):
+        pass
+
+#Apresentador usado pelas operações do menu
+apresentador = ApresentadorConsole()
+
+class CacheLinhasConta:
+    #Linhas da listagem de contas por (agência, número); cada cadastro de contas tem o seu, pois o
+    #mesmo número pode ser de outro titular em outro banco. Agência, número e titular não mudam, então
+    #o início da linha fica guardado e só a parte do saldo é refeita quando o saldo muda.
+    #As linhas menos usadas saem do cache quando ele passa da capacidade.
+    def __init__(self, capacidade=1_000_000):
+        self._linhas = OrderedDict()
+        self._capacidade = capacidade
+
+    def linha(self, conta):
+        chave = (conta.agencia, conta.numero)
+        saldo = conta.saldo
+        guardada = self._linhas.get(chave)
+
+        if guardada is not None:
+            self._linhas.move_to_end(chave)
+
+            if guardada[0] == saldo:
+                return guardada[2]
+
+            inicio = guardada[1]
+
+        else:
+            inicio = f"""\
                     Agência:\t{conta.agencia}
                     Número:\t{conta.numero}
                     Titular:\t{conta.cliente.nome}
-                    Saldo:\tR$ {conta.saldo:.2f}
+"""
+
+        linha = f"""{inicio}                    Saldo:\tR$ {formatar_reais(saldo)}
                 """
-        except IndexError:
-            raise StopIteration
+        self._linhas[chave] = (saldo, inicio, linha)
 
-#decorador de log
-def decorador_log(funcao):
-    def wrapper(*args):
-        
-        data_atual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        nome_funcao = funcao.__name__
+        if len(self._linhas) > self._capacidade:
+            self._linhas.popitem(last=False)
 
-        print(f"#LOG: Executou a função --> {nome_funcao} | Data --> {data_atual}")
-        funcao(*args)
-        
-    return wrapper
+        return linha
+
+class IteradorConta:
+    def __init__(self, contas, cache=None):
+        self._contas = iter(contas)
+        #Sem o cache do cadastro, as linhas são montadas só para esta listagem
+        self._cache = cache if cache is not None else CacheLinhasConta()
+        self.contador = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        conta = next(self._contas)
+        self.contador += 1
+        return self._cache.linha(conta)
+
+#Critérios de ordenação da listagem de contas
+ORDENACOES_CONTAS = {
+    "numero": lambda conta: conta.numero,
+    "titular": lambda conta: conta.cliente.nome.lower(),
+    "saldo": lambda conta: conta.saldo,
+}
+
+#Quantidade de contas por página na listagem do menu
+TAMANHO_PAGINA_CONTAS = 50
+
+def selecionar_contas(contas, titular=None, saldo_minimo=None, saldo_maximo=None, ordenar_por=None,
+                      decrescente=False, deslocamento=0, limite=None):
+    #Filtra, ordena e pagina as contas sob demanda. Com limite, a ordenação guarda apenas as
+    #deslocamento + limite primeiras contas (heapq), sem ordenar todas
+    selecionadas = iter(contas)
+
+    if titular:
+        titular = titular.lower()
+        selecionadas = (conta for conta in selecionadas if titular in conta.cliente.nome.lower())
+
+    if saldo_minimo is not None:
+        selecionadas = (conta for conta in selecionadas if conta.saldo >= saldo_minimo)
+
+    if saldo_maximo is not None:
+        selecionadas = (conta for conta in selecionadas if conta.saldo <= saldo_maximo)
+
+    if ordenar_por is not None:
+        chave = ORDENACOES_CONTAS[ordenar_por]
+
+        if limite is not None:
+            escolher = heapq.nlargest if decrescente else heapq.nsmallest
+            selecionadas = iter(escolher(deslocamento + limite, selecionadas, key=chave))
+        else:
+            selecionadas = iter(sorted(selecionadas, key=chave, reverse=decrescente))
+
+    return islice(selecionadas, deslocamento, None if limite is None else deslocamento + limite)
 
 #gerador para ser usado nas transaçoes
-def gerador_transacao(transacoes, tipo_transacao):
-    
-    if tipo_transacao == "Saque":
-        transacoes = [transacao for transacao in transacoes if transacao["tipo"] == "Saque"]
-    elif tipo_transacao == "Deposito":
-        transacoes = [transacao for transacao in transacoes if transacao["tipo"] == "Deposito"]
-    
-    if len(transacoes) == 0:
-            print(f"Não existem transações do tipo {tipo_transacao} no extrato.")
-            return
-    
-    for transacao in transacoes:
+#Percorre o histórico sob demanda, sem copiar a lista, então a primeira linha sai sem esperar
+#o filtro terminar. Como o histórico está em ordem de data, a busca para assim que passa do período.
+def gerador_transacao(transacoes, tipo_transacao="", data_inicio=None, data_fim=None, valor_minimo=None,
+                      valor_maximo=None, deslocamento=0, limite=None, mais_recentes_primeiro=False):
+    filtrar_data = data_inicio is not None or data_fim is not None
+    encontradas = 0
+
+    for transacao in reversed(transacoes) if mais_recentes_primeiro else transacoes:
+        if filtrar_data:
+            data = transacao["data"]
+
+            if data_fim is not None and data >= data_fim:
+                if mais_recentes_primeiro:
+                    continue
+                break
+
+            if data_inicio is not None and data < data_inicio:
+                if mais_recentes_primeiro:
+                    break
+                continue
+
+        if tipo_transacao and transacao["tipo"] != tipo_transacao:
+            continue
+
+        if valor_minimo is not None and transacao["valor"] < valor_minimo:
+            continue
+
+        if valor_maximo is not None and transacao["valor"] > valor_maximo:
+            continue
+
+        encontradas += 1
+
+        if encontradas <= deslocamento:
+            continue
+
         yield transacao
 
-def contar_transacoes_dia(transacoes):
-    data_atual = date.today().strftime("%d/%m/%Y")
-    numero_transacoes = len(
-            [transacao for transacao in transacoes if transacao["data"].strftime("%d/%m/%Y") == data_atual]
-        )
-    return numero_transacoes
+        if limite is not None and encontradas >= deslocamento + limite:
+            return
+
+
+def escrever_em_blocos(linhas, tamanho_bloco=1000):
+    #Junta as linhas e faz uma única escrita por bloco, em vez de um print por linha.
+    #Devolve a quantidade de linhas escritas
+    bloco = []
+    quantidade = 0
+
+    for linha in linhas:
+        bloco.append(linha)
+
+        if len(bloco) >= tamanho_bloco:
+            sys.stdout.write("".join(bloco))
+            quantidade += len(bloco)
+            bloco.clear()
+
+    sys.stdout.write("".join(bloco))
+    sys.stdout.flush()
+
+    return quantidade + len(bloco)
 
 def menu(titulo):
     # Menu de opcoes
@@ -251,6 +769,8 @@ def menu(titulo):
     [4] -> Cadastrar Cliente
     [5] -> Cadastrar Conta Corrente
     [6] -> Listar Contas
+    [7] -> Métricas
+    [8] -> Saldos no Fim do Dia
     [0] -> Sair
     '''
     ))
@@ -258,75 +778,87 @@ def menu(titulo):
     return opcao
 
 @decorador_log
-def sacar(clientes):
+def sacar(banco):
     cpf = input(f"Informe o seu CPF:")
     
     # Valida se o cliente está cadastrado
-    cliente = filtrar_clientes(cpf, clientes)
+    cliente = banco.buscar_cliente(cpf)
 
     if not cliente:
         print("\n@@@ Operação falhou! Cliente não cadastrado. @@@\n")
         return
     
     #valida se o cliente possui uma conta
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print("\n@@@ Operação falhou! Cliente não possui conta cadastrada. @@@\n")
         return
     
-    valor = float(input(f"Informe o valor do saque:\n"))
+    valor = para_centavos(input(f"Informe o valor do saque:\n"))
 
     transacao = Saque(valor)
 
-    cliente.realizar_transacao(conta, transacao)
+    resultado = banco.realizar_transacao(cpf, transacao, conta.numero)
+    apresentador.exibir(transacao, resultado)
+
+    return resultado
 
 @decorador_log
-def depositar(clientes):
+def depositar(banco):
     cpf = input(f"Informe o seu CPF:")
     
     # Valida se o cliente está cadastrado
-    cliente = filtrar_clientes(cpf, clientes)
+    cliente = banco.buscar_cliente(cpf)
 
     if not cliente:
         print("\nOperação falhou! Cliente não cadastrado.\n")
         return
     
     #valida se o cliente possui uma conta
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print("\nOperação falhou! Cliente não possui conta cadastrada.\n")
         return
     
-    valor = float(input(f"Informe o valor do depósito:\n"))
+    valor = para_centavos(input(f"Informe o valor do depósito:\n"))
 
     transacao = Deposito(valor)
 
-    cliente.realizar_transacao(conta, transacao)
+    resultado = banco.realizar_transacao(cpf, transacao, conta.numero)
+    apresentador.exibir(transacao, resultado)
+
+    return resultado
 
 #@decorador_log
 def filtrar_clientes(cpf, clientes):
-    for cliente in clientes:
-        cliente_existe = cliente.cpf == cpf
+    return clientes.buscar(cpf)
 
-        if cliente_existe:
-            return cliente
+def recuperar_conta_cliente(cliente, numero=None, agencia=AGENCIA_PADRAO):
+    #Sem número, usa a primeira conta cadastrada do cliente
+    if numero is None:
+        return next(iter(cliente.contas.values()), None)
 
-def recuperar_conta_cliente(cliente):
+    return cliente.contas.get((agencia, numero))
 
-    if not cliente.contas:
-        return
-    
-    return cliente.contas[0]
+def selecionar_conta(cliente):
+    #Pergunta o número da conta apenas quando o cliente tem mais de uma
+    if len(cliente.contas) <= 1:
+        return recuperar_conta_cliente(cliente)
+
+    numero = input("Informe o número da conta:\n").strip()
+
+    if not numero.isdigit():
+        return None
+
+    return recuperar_conta_cliente(cliente, int(numero))
 
 @decorador_log
-def cadastrar_cliente(clientes):
+def cadastrar_cliente(banco):
     cpf = input("Informe o CPF do cliente:\n")
 
-    cliente = filtrar_clientes(cpf, clientes)
-
-    if cliente:
+    if banco.buscar_cliente(cpf):
         print("Cliente já cadastrado.")
         return
     
@@ -334,105 +866,678 @@ def cadastrar_cliente(clientes):
     endereco = input("Informe o endereço do cliente:\n")
     data_nasc = input("Informe a data de nascimento do cliente:\n")
 
-    cliente = PessoaFisica(endereco, cpf, nome, data_nasc)
+    try:
+        banco.cadastrar_cliente(cpf, nome, endereco, data_nasc)
+    except ErroBanco:
+        print("Cliente já cadastrado.")
+        return
 
     print("\nCliente cadastrado com sucesso\n")
 
-    clientes.append(cliente)
-
 @decorador_log
-def cadastrar_conta(numero, clientes, contas):
+def cadastrar_conta(banco):
     cpf = input("Informe o CPF do cliente:\n")
 
-    cliente = filtrar_clientes(cpf, clientes)
+    try:
+        conta = banco.cadastrar_conta(cpf)
 
-    if not cliente:
-        print(f"\n @@@ Operação falhou! Cliente não cadastrado para o CPF: {cpf}. @@@\n")
-        return    
-    
-    conta = ContaCorrente.nova_conta(numero, cliente)
-    contas.append(conta)
-    cliente.contas.append(conta)
+    except ErroBanco as erro:
+        if erro.codigo == "cliente_nao_cadastrado":
+            print(f"\n @@@ Operação falhou! Cliente não cadastrado para o CPF: {cpf}. @@@\n")
+        else:
+            print(f"\n @@@ Operação falhou! Conta {erro.args[1]} já cadastrada. @@@\n")
+        return
 
-    print(f"\n @@@ Conta cadastrada para o cliente {cliente.nome}  @@@\n")
+    print(f"\n @@@ Conta cadastrada para o cliente {conta.cliente.nome}  @@@\n")
 
 @decorador_log
-def listar_contas(contas):
+def listar_contas(banco):
+    titular = input("Filtrar por titular: (ENTER) para todos.\n").strip()
+    saldo_minimo = input("Saldo mínimo: (ENTER) para qualquer saldo.\n").strip()
+    ordem = input("Ordenar por: (T) titular, (S) maior saldo, (ENTER) número da conta.\n").strip().upper()
+    pagina = input(f"Página de {TAMANHO_PAGINA_CONTAS} contas: (ENTER) para todas.\n").strip()
+
     print("\n====== Contas Cadastradas ======\n")
 
-    if len(contas) == 0:
+    if len(banco.contas) == 0:
         print("@@@ Operação falhou! Nenhuma conta cadastrada! @@@ \n")
         return
 
-    for conta in IteradorConta(contas):
-        print(conta)
+    try:
+        saldo_minimo = para_centavos(saldo_minimo) if saldo_minimo else None
+        pagina = int(pagina) if pagina else None
+    except ValueError:
+        print("\n@@@ Operação falhou! Valor inválido! @@@\n")
+        return
+
+    if pagina is not None and pagina < 1:
+        print("\n@@@ Operação falhou! Página inválida! @@@\n")
+        return
+
+    selecionadas = banco.listar_contas(
+        titular,
+        saldo_minimo,
+        ordenar_por={"T": "titular", "S": "saldo"}.get(ordem),
+        decrescente=ordem == "S",
+        deslocamento=(pagina - 1) * TAMANHO_PAGINA_CONTAS if pagina else 0,
+        limite=TAMANHO_PAGINA_CONTAS if pagina else None,
+    )
+
+    #As linhas vêm do cache e saem em blocos, com uma escrita por bloco
+    if escrever_em_blocos(f"{linha}\n" for linha in IteradorConta(selecionadas, banco.contas.linhas)) == 0:
+        print("\n Nenhuma conta encontrada.\n")
 
 @decorador_log
-def exibir_extrato(clientes):
+def exibir_extrato(banco):
     cpf = input("Informe o seu CPF:\n")
     tipo_transacao = input("Informe o tipo de transação: (S) Saque, (D) Deposito, (ENTER) para todas.\n")
 
+    ordem = input("Informe a ordem: (R) mais recentes primeiro, (ENTER) mais antigas primeiro.\n")
+    periodo = input("Informe o período: (dd/mm/aaaa-dd/mm/aaaa), (ENTER) para todo o histórico.\n")
+
     if tipo_transacao != "":
         tipo_transacao = "Saque" if tipo_transacao == "S" else "Deposito"
     
-    cliente = filtrar_clientes(cpf, clientes)
+    cliente = banco.buscar_cliente(cpf)
 
     if not cliente:
         print("\n@@@ Operação falhou! Cliente não cadastrado! @@@\n")
         return
     
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print(f"\n@@@ Operação falhou! Conta não cadastrada para o CPF: {cliente.cpf}! @@@\n")
         return
 
-    transacoes = conta.historico.transacoes
+    inicio = fim = None
+
+    if periodo:
+        try:
+            inicio, fim = (datetime.strptime(data.strip(), "%d/%m/%Y") for data in periodo.split("-"))
+        except ValueError:
+            print("\n@@@ Operação falhou! Período inválido! @@@\n")
+            return
+
+        #O fim do período inclui o último dia
+        fim += timedelta(days=1)
+
+    transacoes = banco.extrato(cpf, conta.numero, tipo_transacao, inicio, fim, ordem.upper() == "R")
 
     print(f"\n====== Extrato conta número: {conta.numero} ======\n")
 
-    if len(transacoes) > 0:
-        for transacao in gerador_transacao(transacoes, tipo_transacao):
-             print(f"{transacao["tipo"]}     R${transacao["valor"]:.2f}      {transacao["data"].strftime("%d/%m/%y %H:%M:%S")}")
-    
-    else:
-        print("\n Conta ainda não possui transações.\n")
+    escritas = escrever_em_blocos(
+        f"{transacao["tipo"]}     R${formatar_reais(transacao["valor"])}      {transacao["data"]:%d/%m/%y %H:%M:%S}\n"
+        for transacao in transacoes
+    )
+
+    if escritas == 0:
+        if periodo and len(conta.historico.transacoes_entre(inicio, fim)) == 0:
+            print("\n Não existem transações no período informado.\n")
+
+        elif len(conta.historico.transacoes) == 0:
+            print("\n Conta ainda não possui transações.\n")
+
+        else:
+            print(f"Não existem transações do tipo {tipo_transacao} no extrato.")
 
-    print(f"\n Saldo: R$ {conta.saldo:.2f}\n")
+    print(f"\n Saldo: R$ {formatar_reais(conta.saldo)}\n")
     print(f"\n====== Fim Extrato ======\n")
 
-def main():    
-    clientes = []
-    contas = []
-    
+def relatorio_saldos_fim_dia(saldos):
+    for conta, saldo in saldos:
+        valor = "desconhecido" if saldo is None else f"R${formatar_reais(saldo)}"
+        yield f"{conta.agencia}     {conta.numero}     {conta.cliente.nome}     {valor}\n"
+
+@decorador_log
+def exibir_saldos_fim_dia(banco):
+    data = input("Informe a data: (dd/mm/aaaa), (ENTER) para hoje.\n")
+
+    try:
+        dia = datetime.strptime(data.strip(), "%d/%m/%Y").date() if data else date.today()
+    except ValueError:
+        print("\n@@@ Operação falhou! Data inválida! @@@\n")
+        return
+
+    print(f"\n====== Saldos em {dia:%d/%m/%Y} ======\n")
+
+    if len(banco.contas) == 0:
+        print("@@@ Operação falhou! Nenhuma conta cadastrada! @@@ \n")
+        return
+
+    escrever_em_blocos(relatorio_saldos_fim_dia(banco.saldos_fim_dia(dia)))
+
+def exibir_metricas(banco, caminho="metricas.prom"):
+    print("\n====== Métricas ======\n")
+    print(banco.metricas())
+
+    metricas.registro.exportar_prometheus(caminho)
+    print(f"\n=== Métricas exportadas para {caminho} ===\n")
+
+class GravadorDiario:
+    #Ouvinte que grava os eventos no diário e salva um snapshot quando o intervalo é atingido
+    def __init__(self, diario, clientes, contas, trava_estado):
+        self._diario = diario
+        self._clientes = clientes
+        self._contas = contas
+        self._trava_estado = trava_estado
+
+    def __call__(self, evento, *dados):
+        if evento == "transacao":
+            conta, transacao, data = dados
+            codigo = HistoricoColunar.CODIGOS[transacao.__class__.__name__]
+            self._diario.registrar_transacao(conta.numero, codigo, transacao.valor, data.timestamp())
+
+            if self._diario.snapshot_pendente:
+                self._diario.gravar_snapshot(self.copiar_estado)
+
+        elif evento == "cliente":
+            (cliente,) = dados
+            self._diario.registrar_cliente(cliente.cpf, cliente.nome, cliente.endereco, cliente.data_nasc)
+
+        elif evento == "conta":
+            (conta,) = dados
+            self._diario.registrar_conta(conta.numero, conta.cliente.cpf, conta.aberta_em)
+
+    def copiar_estado(self):
+        #Chamado na thread do snapshot, que ainda não está na parte compartilhada: espera as transações em
+        #andamento terminarem e bloqueia as novas enquanto lê a posição do diário e copia o estado
+        with self._trava_estado.exclusiva():
+            return self._diario.posicao(), self.estado()
+
+    def estado(self):
+        #Cópia do estado: a gravação do snapshot continua em segundo plano enquanto as transações seguem
+        return {
+            "instante": datetime.now().timestamp(),
+            "clientes": [
+                (cliente.cpf, cliente.nome, cliente.endereco, cliente.data_nasc) for cliente in self._clientes
+            ],
+            "contas": [
+                (conta.numero, conta.cliente.cpf, conta.saldo, conta.copiar_estados_limites(), conta.aberta_em)
+                for conta in self._contas
+            ],
+        }
+
+def restaurar_estado(diario, contexto=None):
+    #Reconstrói clientes e contas a partir do último snapshot e dos registros posteriores do diário.
+    #O histórico de cada conta passa a conter apenas as transações registradas após o snapshot; os
+    #estados dos limites vêm do snapshot e recebem as transações reaplicadas. O saldo dessas contas
+    #em datas anteriores ao snapshot fica desconhecido.
+    clientes = ClienteRegistry(contexto)
+    contas = ContaRegistry()
+    classes_transacao = {Deposito.__name__: Deposito, Saque.__name__: Saque}
+
+    def restaurar_conta(numero, cpf, aberta_em):
+        cliente = clientes.buscar(cpf)
+        conta = ContaCorrente.nova_conta(numero, cliente, contexto)
+        conta._aberta_em = aberta_em
+        contas.adicionar(conta)
+        cliente.adicionar_conta(conta)
+        return conta
+
+    estado, registros = diario.recuperar()
+
+    if estado:
+        #Snapshots antigos não guardam o instante: só o período após a restauração é conhecido
+        instante_snapshot = estado.get("instante", datetime.now().timestamp())
+
+        for cpf, nome, endereco, data_nasc in estado["clientes"]:
+            clientes.adicionar(PessoaFisica(endereco, cpf, nome, data_nasc))
+
+        #Snapshots antigos não guardam a abertura das contas
+        for numero, cpf, saldo, estados_limites, *aberta_em in estado["contas"]:
+            conta = restaurar_conta(numero, cpf, aberta_em[0] if aberta_em else None)
+            conta._saldo = saldo
+            conta.historico._conhecido_desde = instante_snapshot
+
+            #Snapshots anteriores às políticas guardavam a contagem por dia (chaves date), sem uso agora
+            conta.estados_limites.update(
+                (chave, estado) for chave, estado in estados_limites.items() if not isinstance(chave, date)
+            )
+
+    for tipo, dados in registros:
+        if tipo == TRANSACAO:
+            numero, codigo, centavos, instante = dados
+            conta = contas.buscar(numero)
+            transacao = classes_transacao[HistoricoColunar.TIPOS[codigo]](centavos)
+
+            if isinstance(transacao, Deposito):
+                conta._saldo += transacao.valor
+            else:
+                conta._saldo -= transacao.valor
+
+            conta.historico.adicionar_transacao(transacao, datetime.fromtimestamp(instante), conta.saldo)
+            conta.reaplicar_limites(transacao, instante)
+
+        elif tipo == CLIENTE:
+            cpf, nome, endereco, data_nasc = dados
+            clientes.adicionar(PessoaFisica(endereco, cpf, nome, data_nasc))
+
+        elif tipo == CONTA:
+            restaurar_conta(*dados)
+
+    return clientes, contas
+
+class TransacoesSQLite(Sequence):
+    #Visão somente leitura das transações de uma conta (opcionalmente de um período), consultadas no SQLite sob demanda
+    def __init__(self, armazenamento, numero, inicio=None, fim=None, tipo=None):
+        self._armazenamento = armazenamento
+        self._numero = numero
+        #tipo é o nome da transação (ex.: "Saque"), consultado pelo código gravado
+        codigo = None if tipo is None else HistoricoColunar.CODIGOS[tipo]
+        self._periodo = {"inicio": inicio, "fim": fim, "tipo": codigo}
+
+    @staticmethod
+    def _montar(linha):
+        tipo, centavos, instante, saldo = linha
+
+        return {
+            "tipo": HistoricoColunar.TIPOS[tipo],
+            "valor": centavos,
+            "data": datetime.fromtimestamp(instante),
+            "saldo": saldo,
+        }
+
+    def __len__(self):
+        return self._armazenamento.contar_transacoes(self._numero, **self._periodo)
+
+    def __iter__(self):
+        return map(self._montar, self._armazenamento.transacoes(self._numero, **self._periodo))
+
+    def __reversed__(self):
+        return map(self._montar, self._armazenamento.transacoes(self._numero, decrescente=True, **self._periodo))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self))
+
+            if passo != 1:
+                return [self[i] for i in range(inicio, fim, passo)]
+
+            linhas = self._armazenamento.transacoes(
+                self._numero, deslocamento=inicio, limite=max(fim - inicio, 0), **self._periodo
+            )
+            return [self._montar(linha) for linha in linhas]
+
+        if indice < 0:
+            indice += len(self)
+
+        linhas = list(self._armazenamento.transacoes(self._numero, deslocamento=indice, limite=1, **self._periodo))
+
+        if not linhas:
+            raise IndexError(indice)
+
+        return self._montar(linhas[0])
+
+class HistoricoSQLite(Historico):
+    #Histórico de uma conta persistida no SQLite. As transações são gravadas pelo GravadorSQLite
+    __slots__ = ("_armazenamento", "_numero")
+
+    def __init__(self, armazenamento, numero):
+        super().__init__()
+        self._armazenamento = armazenamento
+        self._numero = numero
+        self._transacoes = TransacoesSQLite(armazenamento, numero)
+
+    def transacoes_entre(self, inicio=None, fim=None):
+        #Consulta pelo índice (conta, instante)
+        return TransacoesSQLite(self._armazenamento, self._numero, inicio, fim)
+
+    def transacoes_do_tipo(self, tipo, inicio=None, fim=None):
+        #Consulta pelo índice (conta, tipo, instante), sem ler as transações de outros tipos
+        return TransacoesSQLite(self._armazenamento, self._numero, inicio, fim, tipo)
+
+    def saldo_em(self, data):
+        return self._armazenamento.saldo_em(self._numero, data)
+
+    def ultimo_instante(self):
+        return self._armazenamento.ultimo_instante(self._numero)
+
+    def _armazenar(self, tipo, valor, data, saldo):
+        pass
+
+class ClienteRegistrySQLite(ClienteRegistry):
+    #Mantém em memória apenas os clientes usados mais recentemente, os demais ficam no SQLite.
+    #Um cliente (com suas contas) só é carregado de novo quando nenhuma referência a ele ou às suas
+    #contas continua em uso: assim cada conta tem um único objeto e nenhuma atualização se perde.
+    def __init__(self, armazenamento, capacidade_cache=10_000, contexto=None):
+        super().__init__(contexto)
+        self._armazenamento = armazenamento
+        self._capacidade_cache = capacidade_cache
+        self._clientes = OrderedDict()
+        #Todos os clientes carregados que ainda estão em uso, inclusive os que já saíram do cache
+        self._carregados = weakref.WeakValueDictionary()
+
+    def _guardar(self, cpf, cliente):
+        self._clientes[cpf] = cliente
+        self._carregados[cpf] = cliente
+
+        if len(self._clientes) > self._capacidade_cache:
+            self._clientes.popitem(last=False)
+
+    def buscar(self, cpf):
+        cpf = self.normalizar_cpf(cpf)
+        cliente = self._clientes.get(cpf)
+
+        if cliente is not None:
+            self._clientes.move_to_end(cpf)
+            return cliente
+
+        cliente = self._carregados.get(cpf)
+
+        if cliente is not None:
+            self._guardar(cpf, cliente)
+            return cliente
+
+        linha = self._armazenamento.buscar_cliente(cpf)
+
+        if not linha:
+            return None
+
+        cpf, nome, endereco, data_nasc = linha
+        cliente = PessoaFisica(endereco, cpf, nome, data_nasc)
+
+        for numero, agencia, saldo, aberta_em in self._armazenamento.contas_cliente(cpf):
+            conta = ContaCorrente.nova_conta(numero, cliente, self._contexto)
+            conta._agencia = agencia
+            conta._saldo = saldo
+            conta._aberta_em = aberta_em
+            conta._historico = HistoricoSQLite(self._armazenamento, numero)
+            cliente.adicionar_conta(conta)
+
+        self._guardar(cpf, cliente)
+        return cliente
+
+    def adicionar(self, cliente):
+        cpf = self.normalizar_cpf(cliente.cpf)
+
+        if not self._armazenamento.salvar_cliente(cpf, cliente.nome, cliente.endereco, cliente.data_nasc):
+            return False
+
+        self._guardar(cpf, cliente)
+        self._contexto.notificar("cliente", cliente)
+        return True
+
+    def __contains__(self, cpf):
+        return self.buscar(cpf) is not None
+
+    def __len__(self):
+        return self._armazenamento.quantidade_clientes()
+
+    def __iter__(self):
+        ultimo = ""
+
+        while cpfs := self._armazenamento.cpfs_clientes(ultimo):
+            for cpf in cpfs:
+                yield self.buscar(cpf)
+
+            ultimo = cpfs[-1]
+
+class ContasSQLite(Sequence):
+    #Substitui o ContaRegistry do menu: consulta as contas no SQLite e grava as novas
+    def __init__(self, armazenamento, clientes):
+        self._armazenamento = armazenamento
+        self._clientes = clientes
+        #Linhas da listagem destas contas
+        self.linhas = CacheLinhasConta()
+
+    def __len__(self):
+        return self._armazenamento.quantidade_contas()
+
+    def __getitem__(self, posicao):
+        linha = self._armazenamento.conta_na_posicao(posicao)
+
+        if not linha:
+            raise IndexError(posicao)
+
+        numero, cpf, agencia = linha
+        return self._clientes.buscar(cpf).contas.get((agencia, numero))
+
+    def __iter__(self):
+        #Em páginas pelo número da conta; Sequence.__iter__ faria uma consulta com OFFSET por posição
+        ultimo = 0
+
+        while linhas := self._armazenamento.contas_apos(ultimo):
+            for numero, cpf, agencia in linhas:
+                yield self._clientes.buscar(cpf).contas.get((agencia, numero))
+
+            ultimo = linhas[-1][0]
+
+    def buscar(self, numero, agencia=AGENCIA_PADRAO):
+        cpf = self._armazenamento.cpf_da_conta(numero, agencia)
+
+        if cpf is None:
+            return None
+
+        return self._clientes.buscar(cpf).contas.get((agencia, numero))
+
+    def adicionar(self, conta):
+        cpf = ClienteRegistry.normalizar_cpf(conta.cliente.cpf)
+
+        if not self._armazenamento.salvar_conta(conta.numero, cpf, conta.agencia, conta.saldo, conta.aberta_em):
+            return False
+
+        conta._historico = HistoricoSQLite(self._armazenamento, conta.numero)
+        return True
+
+    def __contains__(self, chave):
+        agencia, numero = chave
+        return self.buscar(numero, agencia) is not None
+
+    def maior_numero(self):
+        return self._armazenamento.maior_numero_conta()
+
+class GravadorSQLite:
+    #Ouvinte que grava cada transação e o novo saldo da conta em lote no SQLite
+    def __init__(self, armazenamento):
+        self._armazenamento = armazenamento
+
+    def __call__(self, evento, *dados):
+        if evento == "transacao":
+            conta, transacao, data = dados
+            codigo = HistoricoColunar.CODIGOS[transacao.__class__.__name__]
+            self._armazenamento.registrar_transacao(
+                conta.numero, codigo, transacao.valor, data.timestamp(), conta.saldo
+            )
+
+class ErroBanco(Exception):
+    #Falha de uma operação do Banco; o primeiro argumento é o código do motivo, ex.: "cliente_nao_cadastrado"
+    @property
+    def codigo(self):
+        return self.args[0]
+
+class Banco:
+    #Operações do menu sem input() nem print(), para uso por outros programas (serviços, lotes,
+    #benchmarks). Valores em centavos. O menu interativo apenas lê os dados, chama o Banco e exibe
+    #o resultado. Com Banco.abrir, os dados são carregados e gravados no diário ou no SQLite; use
+    #com `with` (ou chame fechar) para gravar o que estiver pendente. Ouvintes e políticas ficam no
+    #contexto de cada Banco. As operações alimentam o registro de métricas, com as falhas contadas
+    #pelo código do ErroBanco ou pelo ResultadoOperacao.
+    def __init__(self, clientes=None, contas=None, numeros_conta=None, contexto=None):
+        self.contexto = contexto if contexto is not None else ContextoBanco()
+        self.clientes = clientes if clientes is not None else ClienteRegistry(self.contexto)
+        self.contas = contas if contas is not None else ContaRegistry()
+        self.numeros_conta = (
+            numeros_conta if numeros_conta is not None else AlocadorNumeros(minimo=self.contas.maior_numero() + 1)
+        )
+        self._armazenamento = None
+        self._gravador = None
+
+    @classmethod
+    def abrir(cls, diretorio_dados="dados", usar_sqlite=False, caminho_politicas="politicas.json"):
+        contexto = ContextoBanco()
+
+        if caminho_politicas and os.path.exists(caminho_politicas):
+            contexto.motor_politicas.carregar(caminho_politicas)
+
+        if usar_sqlite:
+            os.makedirs(diretorio_dados, exist_ok=True)
+            armazenamento = ArmazenamentoSQLite(os.path.join(diretorio_dados, "banco.sqlite3"))
+
+            clientes = ClienteRegistrySQLite(armazenamento, contexto=contexto)
+            contas = ContasSQLite(armazenamento, clientes)
+            gravador = GravadorSQLite(armazenamento)
+
+        else:
+            armazenamento = DiarioTransacoes(diretorio_dados)
+
+            clientes, contas = restaurar_estado(armazenamento, contexto)
+            gravador = GravadorDiario(armazenamento, clientes, contas, contexto.trava_estado)
+
+        #A marca gravada mantém os números únicos após reiniciar; o mínimo cobre dados anteriores a ela
+        numeros_conta = AlocadorNumeros(os.path.join(diretorio_dados, "numero_conta"), minimo=contas.maior_numero() + 1)
+
+        banco = cls(clientes, contas, numeros_conta, contexto)
+        banco._armazenamento = armazenamento
+        banco._gravador = gravador
+        contexto.ouvintes.append(gravador)
+
+        return banco
+
+    def fechar(self):
+        if self._gravador is None:
+            return
+
+        self.contexto.ouvintes.remove(self._gravador)
+        self._gravador = None
+        self._armazenamento.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def buscar_cliente(self, cpf):
+        return filtrar_clientes(cpf, self.clientes)
+
+    def conta(self, cpf, numero=None, agencia=AGENCIA_PADRAO):
+        #Sem número, devolve a primeira conta do cliente
+        cliente = self.buscar_cliente(cpf)
+
+        if not cliente:
+            raise ErroBanco("cliente_nao_cadastrado")
+
+        conta = recuperar_conta_cliente(cliente, numero, agencia)
+
+        if not conta:
+            raise ErroBanco("conta_nao_cadastrada")
+
+        return conta
+
+    @metricas.medir
+    def cadastrar_cliente(self, cpf, nome, endereco, data_nasc):
+        cliente = PessoaFisica(endereco, cpf, nome, data_nasc)
+
+        if not self.clientes.adicionar(cliente):
+            raise ErroBanco("cliente_ja_cadastrado")
+
+        return cliente
+
+    @metricas.medir
+    def cadastrar_conta(self, cpf):
+        cliente = self.buscar_cliente(cpf)
+
+        if not cliente:
+            raise ErroBanco("cliente_nao_cadastrado")
+
+        #O número só é retirado da sequência depois de validar o cliente
+        conta = ContaCorrente.nova_conta(next(self.numeros_conta), cliente, self.contexto)
+
+        with self.contexto.trava_estado.compartilhada():
+            if not self.contas.adicionar(conta):
+                raise ErroBanco("conta_ja_cadastrada", conta.numero)
+
+            cliente.adicionar_conta(conta)
+            self.contexto.notificar("conta", conta)
+
+        return conta
+
+    @metricas.medir
+    def realizar_transacao(self, cpf, transacao, numero=None, agencia=AGENCIA_PADRAO):
+        conta = self.conta(cpf, numero, agencia)
+        return conta.cliente.realizar_transacao(conta, transacao)
+
+    def sacar(self, cpf, valor, numero=None, agencia=AGENCIA_PADRAO):
+        return self.realizar_transacao(cpf, Saque(valor), numero, agencia)
+
+    def depositar(self, cpf, valor, numero=None, agencia=AGENCIA_PADRAO):
+        return self.realizar_transacao(cpf, Deposito(valor), numero, agencia)
+
+    @metricas.medir_iteracao
+    def extrato(self, cpf, numero=None, tipo_transacao="", inicio=None, fim=None, mais_recentes_primeiro=False,
+                agencia=AGENCIA_PADRAO):
+        #Transações da conta com inicio <= data < fim, geradas sob demanda
+        conta = self.conta(cpf, numero, agencia)
+
+        if tipo_transacao:
+            transacoes = conta.historico.transacoes_do_tipo(tipo_transacao, inicio, fim)
+        elif inicio is not None or fim is not None:
+            transacoes = conta.historico.transacoes_entre(inicio, fim)
+        else:
+            transacoes = conta.historico.transacoes
+
+        return gerador_transacao(transacoes, tipo_transacao, mais_recentes_primeiro=mais_recentes_primeiro)
+
+    @metricas.medir_iteracao
+    def listar_contas(self, titular=None, saldo_minimo=None, saldo_maximo=None, ordenar_por=None,
+                      decrescente=False, deslocamento=0, limite=None):
+        return selecionar_contas(
+            self.contas, titular, saldo_minimo, saldo_maximo, ordenar_por, decrescente, deslocamento, limite
+        )
+
+    def saldos_fim_dia(self, dia):
+        #(conta, saldo) ao fim do dia, com uma busca binária no histórico de cada conta; saldo None
+        #quando a conta ainda não existia ou o saldo é desconhecido (dia anterior ao snapshot de onde a
+        #conta foi restaurada)
+        fim_dia = datetime.combine(dia, time.max)
+
+        for conta in self.contas:
+            yield conta, conta.saldo_em(fim_dia)
+
+    def metricas(self):
+        return metricas.registro.resumo()
+
+def main(diretorio_dados="dados", usar_sqlite=False, caminho_politicas="politicas.json"):
+    with Banco.abrir(diretorio_dados, usar_sqlite, caminho_politicas) as banco:
+        executar_menu(banco)
+
+def executar_menu(banco):
     while True:
         # Menu de opcoes
         opcao = menu("Banco PC")
 
         # Operação de Saque
         if (opcao == 1):
-            sacar(clientes)
+            sacar(banco)
                     
         #Operação depositar
         elif(opcao == 2):
-            depositar(clientes)
+            depositar(banco)
 
         #Operação exibir extrato
         elif(opcao == 3):
-            exibir_extrato(clientes)
+            exibir_extrato(banco)
 
         #Operação cadastrar cliente
         elif(opcao == 4):            
-            cadastrar_cliente(clientes)
+            cadastrar_cliente(banco)
 
         #Operação cadastrar conta
         elif(opcao == 5):
-            numero = len(contas) + 1
-            cadastrar_conta(numero, clientes, contas)
+            cadastrar_conta(banco)
 
         #Operação listar contas
         elif(opcao == 6):
-            listar_contas(contas)
+            listar_contas(banco)
+
+        #Operação exibir métricas
+        elif(opcao == 7):
+            exibir_metricas(banco)
+
+        #Operação saldos no fim do dia
+        elif(opcao == 8):
+            exibir_saldos_fim_dia(banco)
 
         elif(opcao == 0):
             break
@@ -440,4 +1545,5 @@ def main():
         else:
             print("Operação falhou. Digite uma opção válida.")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main(usar_sqlite="--sqlite" in sys.argv)
@@ -1,7 +1,50 @@
 from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Sequence
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from enum import Enum
+from itertools import count, islice
+from operator import index
+
+import heapq
+import sys
+from collections import OrderedDict
+
+import metricas
+from instrumentacao import decorador_log
+from metricas import ler_entrada
+
+class ResultadoOperacao(Enum):
+    #Resultado de um saque ou depósito, avaliado como verdadeiro apenas em caso de sucesso
+    SUCESSO = "sucesso"
+    VALOR_INVALIDO = "valor_invalido"
+    SALDO_INSUFICIENTE = "saldo_insuficiente"
+    LIMITE_VALOR_EXCEDIDO = "limite_valor_excedido"
+    LIMITE_SAQUES_EXCEDIDO = "limite_saques_excedido"
+
+    def __bool__(self):
+        return self is ResultadoOperacao.SUCESSO
+
+#Valores em dinheiro são inteiros em centavos: somas e subtrações exatas, sem o desvio acumulado do float
+def para_centavos(valor):
+    #Converte um valor em reais (texto, int, float ou Decimal) para centavos, arredondando o meio centavo para cima
+    if isinstance(valor, int):
+        return valor * 100
+
+    try:
+        return int((Decimal(str(valor).strip()) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {valor!r}")
+
+def formatar_reais(centavos):
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"{sinal}{reais}.{resto:02d}"
 
 class Transacao(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def registrar(self, conta):
         pass
@@ -12,77 +55,220 @@ class Transacao(ABC):
         pass
 
 class Deposito(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor):
-        self._valor = float(valor)
+        #valor em centavos, use para_centavos para converter um valor em reais
+        self._valor = index(valor)
     
+    @metricas.medir
     def registrar(self, conta):
         sucesso_transacao = conta.depositar(self.valor)
 
         if sucesso_transacao:
             conta.historico.adicionar_transacao(self)
+
+        return sucesso_transacao
     
     @property
     def valor(self):
         return self._valor
 
 class Saque(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor):
-        self._valor = float(valor)
+        #valor em centavos, use para_centavos para converter um valor em reais
+        self._valor = index(valor)
 
     @property
     def valor(self):
         return self._valor
     
+    @metricas.medir
     def registrar(self, conta):
         sucesso_transacao = conta.sacar(self.valor)
 
         if sucesso_transacao:
             conta.historico.adicionar_transacao(self)
 
+        return sucesso_transacao
+
 class Historico:
+    __slots__ = ("_transacoes", "_quantidade_por_tipo", "_total_por_tipo")
+
     def __init__(self):
         self._transacoes = []
+        #Quantidade e soma dos valores por tipo de transação, atualizadas a cada inclusão
+        self._quantidade_por_tipo = {}
+        self._total_por_tipo = {}
     
     @property
     def transacoes(self):
         return self._transacoes
     
     def adicionar_transacao(self, transacao):
-        self.transacoes.append(
+        tipo = transacao.__class__.__name__
+        self._armazenar(tipo, transacao.valor, datetime.now())
+
+        self._quantidade_por_tipo[tipo] = self._quantidade_por_tipo.get(tipo, 0) + 1
+        self._total_por_tipo[tipo] = self._total_por_tipo.get(tipo, 0) + transacao.valor
+
+    def quantidade_transacoes(self, tipo):
+        return self._quantidade_por_tipo.get(tipo, 0)
+
+    def total_transacoes(self, tipo):
+        return self._total_por_tipo.get(tipo, 0)
+
+    def _armazenar(self, tipo, valor, data):
+        self._transacoes.append(
             {
-                "tipo": transacao.__class__.__name__,
-                "valor": transacao.valor,
-                "data": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                "tipo": tipo,
+                "valor": valor,
+                "data": data.strftime("%d/%m/%Y %H:%M:%S"),
             }
         )
 
+class TransacoesColunares(Sequence):
+    #Visão somente leitura sobre as colunas do HistoricoColunar, monta cada transação apenas quando acessada
+    def __init__(self, historico):
+        self._historico = historico
+
+    def __len__(self):
+        return len(self._historico._tipos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+
+        historico = self._historico
+
+        return {
+            "tipo": HistoricoColunar.TIPOS[historico._tipos[indice]],
+            "valor": historico._centavos[indice],
+            "data": datetime.fromtimestamp(historico._datas[indice]).strftime("%d/%m/%Y %H:%M:%S"),
+        }
+
+class HistoricoColunar(Historico):
+    #Guarda cada transação em três colunas compactas: tipo (1 byte), valor em centavos e data em segundos (8 bytes cada)
+    __slots__ = ("_tipos", "_centavos", "_datas")
+
+    TIPOS = (Deposito.__name__, Saque.__name__)
+    CODIGOS = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+    def __init__(self):
+        super().__init__()
+        self._tipos = array("b")
+        self._centavos = array("q")
+        self._datas = array("d")
+        self._transacoes = TransacoesColunares(self)
+
+    def _armazenar(self, tipo, valor, data):
+        self._tipos.append(self.CODIGOS[tipo])
+        self._centavos.append(valor)
+        self._datas.append(data.timestamp())
+
 class Cliente:
+    __slots__ = ("endereco", "contas")
+
     def __init__(self, endereco):
         self.endereco = endereco
-        self.contas = []
+        #Contas do cliente por (agência, número)
+        self.contas = {}
 
 
     def realizar_transacao(self, conta, transacao):
-        transacao.registrar(conta)
+        return transacao.registrar(conta)
 
     def adicionar_conta(self, conta):
-        self.contas.append(conta)
+        self.contas[(conta.agencia, conta.numero)] = conta
 
 class PessoaFisica(Cliente):
+    __slots__ = ("cpf", "nome", "data_nasc")
+
     def __init__(self, endereco, cpf, nome, data_nasc):
-        self. cpf = cpf
+        self.cpf = cpf
         self.nome = nome
         self.data_nasc = data_nasc
 
         super().__init__(endereco)
 
+class ClienteRegistry:
+    #Índice de clientes por CPF normalizado, substitui a busca linear na lista de clientes
+    def __init__(self):
+        self._clientes = {}
+
+    @staticmethod
+    def normalizar_cpf(cpf):
+        #Mantém apenas os dígitos, assim "111.222.333-44" e "11122233344" são o mesmo CPF
+        return "".join(caractere for caractere in str(cpf) if caractere.isdigit())
+
+    def buscar(self, cpf):
+        return self._clientes.get(self.normalizar_cpf(cpf))
+
+    def adicionar(self, cliente):
+        #setdefault verifica e insere em uma única operação, evitando cadastro duplicado
+        cpf = self.normalizar_cpf(cliente.cpf)
+        return self._clientes.setdefault(cpf, cliente) is cliente
+
+    def __contains__(self, cpf):
+        return self.normalizar_cpf(cpf) in self._clientes
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def __iter__(self):
+        return iter(self._clientes.values())
+
+#Agência das contas abertas pelo sistema
+AGENCIA_PADRAO = "0001"
+
+class ContaRegistry:
+    #Índice de contas por (agência, número), mantido pelo cadastro de contas
+    def __init__(self):
+        self._contas = {}
+        #Ordem de cadastro, para listar e acessar por posição
+        self._ordem = []
+        #Linhas da listagem destas contas
+        self.linhas = CacheLinhasConta()
+
+    def buscar(self, numero, agencia=AGENCIA_PADRAO):
+        return self._contas.get((agencia, numero))
+
+    def adicionar(self, conta):
+        #setdefault verifica e insere em uma única operação, evitando número de conta duplicado
+        if self._contas.setdefault((conta.agencia, conta.numero), conta) is not conta:
+            return False
+
+        self._ordem.append(conta)
+        return True
+
+    def __contains__(self, chave):
+        return chave in self._contas
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def __iter__(self):
+        return iter(self._ordem)
+
+    def __getitem__(self, posicao):
+        return self._ordem[posicao]
+
 class Conta:
+    #Sem __dict__ por instância, reduz a memória ocupada por milhões de contas
+    __slots__ = ("_saldo", "_numero", "_agencia", "_cliente", "_historico")
+
+    #Classe usada para o histórico de novas contas, pode ser trocada por HistoricoColunar
+    classe_historico = Historico
+
     def __init__(self, numero, cliente):
-        self._saldo = 500
+        #Saldo em centavos
+        self._saldo = 50_000
         self._numero = numero
-        self._agencia = "0001"
+        self._agencia = AGENCIA_PADRAO
         self._cliente = cliente
-        self._historico = Historico()
+        self._historico = self.classe_historico()
     
     @property
     def saldo(self):
@@ -114,55 +300,47 @@ class Conta:
         excedeu_saldo = valor > saldo
 
         if excedeu_saldo:
-            print("\n@@@ Operação falhou! Você não tem saldo suficiente. @@@\n")
+            return ResultadoOperacao.SALDO_INSUFICIENTE
         
         elif valor > 0:
             self._saldo -= valor
-            print("\n=== Saque realizado com sucesso! ===\n")
             
-            return True
+            return ResultadoOperacao.SUCESSO
         
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@\n")
-            
-            return False
+            return ResultadoOperacao.VALOR_INVALIDO
 
     def depositar(self, valor):
         if valor > 0:
             self._saldo += valor
-            print("\n=== Depósito realizado com sucesso! ===\n")
 
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@\n")
-            return False
+            return ResultadoOperacao.VALOR_INVALIDO
         
-        return True
+        return ResultadoOperacao.SUCESSO
 
 class ContaCorrente(Conta):
-    def __init__(self, numero, cliente, limite=500, limite_saques=3):
+    __slots__ = ("_limite", "_limite_saques")
+
+    def __init__(self, numero, cliente, limite=50_000, limite_saques=3):
         self._limite = limite
         self._limite_saques = limite_saques
         super().__init__(numero, cliente)
 
     def sacar(self, valor):
         #Busca a quantidade de transações do tipo saque já efetuadas
-        numero_saques = len(
-            [transacao for transacao in self.historico.transacoes if transacao["tipo"] == Saque.__name__]
-        )
+        numero_saques = self.historico.quantidade_transacoes(Saque.__name__)
 
         excedeu_limite = valor > self._limite
         excedeu_limite_saques = numero_saques >= self._limite_saques
         
         if excedeu_limite_saques:
-            print("\n@@@ Operação falhou! A quantidade de saques foi excedida! @@@\n")
+            return ResultadoOperacao.LIMITE_SAQUES_EXCEDIDO
 
         elif excedeu_limite:
-            print("\n@@@ Operação falhou! O valor limite para saque foi excedido! @@@\n")
-
-        else:
-            return super().sacar(valor)
+            return ResultadoOperacao.LIMITE_VALOR_EXCEDIDO
 
-        return False
+        return super().sacar(valor)
     
     def __str__(self):
         return f"""\
@@ -170,54 +348,183 @@ class ContaCorrente(Conta):
             C/C:\t\t{self.numero}
             Titular:\t{self.cliente.nome}
         """
-class IteradorConta:
-    def __init__(self, contas):
-        self._contas = contas
-        self.contador = 0
 
-    def __iter__(self):
-        return self
+class ApresentadorConsole:
+    #Exibe no console o resultado das transações do menu interativo
+    MENSAGENS_SUCESSO = {
+        Deposito.__name__: "\n=== Depósito realizado com sucesso! ===\n",
+        Saque.__name__: "\n=== Saque realizado com sucesso! ===\n",
+    }
+
+    MENSAGENS_FALHA = {
+        ResultadoOperacao.VALOR_INVALIDO: "\n@@@ Operação falhou! O valor informado é inválido. @@@\n",
+        ResultadoOperacao.SALDO_INSUFICIENTE: "\n@@@ Operação falhou! Você não tem saldo suficiente. @@@\n",
+        ResultadoOperacao.LIMITE_VALOR_EXCEDIDO: "\n@@@ Operação falhou! O valor limite para saque foi excedido! @@@\n",
+        ResultadoOperacao.LIMITE_SAQUES_EXCEDIDO: "\n@@@ Operação falhou! A quantidade de saques foi excedida! @@@\n",
+    }
+
+    def exibir(self, transacao, resultado):
+        if resultado:
+            print(self.MENSAGENS_SUCESSO[transacao.__class__.__name__])
+        else:
+            print(self.MENSAGENS_FALHA[resultado])
 
-    def __next__(self):
-        try:
-            conta = self._contas[self.contador]
-            self.contador += 1
-            return f"""\
+class ApresentadorSilencioso:
+    #Não produz saída, usado em lote e em servidores
+    def exibir(self, transacao, resultado):
+        pass
+
+#Apresentador usado pelas operações do menu
+apresentador = ApresentadorConsole()
+
+class CacheLinhasConta:
+    #Linhas da listagem de contas por (agência, número); cada cadastro de contas tem o seu, pois o
+    #mesmo número pode ser de outro titular em outro banco. Agência, número e titular não mudam, então
+    #o início da linha fica guardado e só a parte do saldo é refeita quando o saldo muda.
+    #As linhas menos usadas saem do cache quando ele passa da capacidade.
+    def __init__(self, capacidade=1_000_000):
+        self._linhas = OrderedDict()
+        self._capacidade = capacidade
+
+    def linha(self, conta):
+        chave = (conta.agencia, conta.numero)
+        saldo = conta.saldo
+        guardada = self._linhas.get(chave)
+
+        if guardada is not None:
+            self._linhas.move_to_end(chave)
+
+            if guardada[0] == saldo:
+                return guardada[2]
+
+            inicio = guardada[1]
+
+        else:
+            inicio = f"""\
                     Agência:\t{conta.agencia}
                     Número:\t{conta.numero}
                     Titular:\t{conta.cliente.nome}
-                    Saldo:\tR$ {conta.saldo:.2f}
+"""
+
+        linha = f"""{inicio}                    Saldo:\tR$ {formatar_reais(saldo)}
                 """
-        except IndexError:
-            raise StopIteration
+        self._linhas[chave] = (saldo, inicio, linha)
 
-#decorador de log
-def decorador_log(funcao):
-    def wrapper(*args):
-        
-        data_atual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        nome_funcao = funcao.__name__
+        if len(self._linhas) > self._capacidade:
+            self._linhas.popitem(last=False)
 
-        print(f"#LOG: Executou a função --> {nome_funcao} | Data --> {data_atual}")
-        funcao(*args)
-        
-    return wrapper
+        return linha
+
+class IteradorConta:
+    def __init__(self, contas, cache=None):
+        self._contas = iter(contas)
+        #Sem o cache do cadastro, as linhas são montadas só para esta listagem
+        self._cache = cache if cache is not None else CacheLinhasConta()
+        self.contador = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        conta = next(self._contas)
+        self.contador += 1
+        return self._cache.linha(conta)
+
+#Critérios de ordenação da listagem de contas
+ORDENACOES_CONTAS = {
+    "numero": lambda conta: conta.numero,
+    "titular": lambda conta: conta.cliente.nome.lower(),
+    "saldo": lambda conta: conta.saldo,
+}
+
+#Quantidade de contas por página na listagem do menu
+TAMANHO_PAGINA_CONTAS = 50
+
+def selecionar_contas(contas, titular=None, saldo_minimo=None, saldo_maximo=None, ordenar_por=None,
+                      decrescente=False, deslocamento=0, limite=None):
+    #Filtra, ordena e pagina as contas sob demanda. Com limite, a ordenação guarda apenas as
+    #deslocamento + limite primeiras contas (heapq), sem ordenar todas
+    selecionadas = iter(contas)
+
+    if titular:
+        titular = titular.lower()
+        selecionadas = (conta for conta in selecionadas if titular in conta.cliente.nome.lower())
+
+    if saldo_minimo is not None:
+        selecionadas = (conta for conta in selecionadas if conta.saldo >= saldo_minimo)
+
+    if saldo_maximo is not None:
+        selecionadas = (conta for conta in selecionadas if conta.saldo <= saldo_maximo)
+
+    if ordenar_por is not None:
+        chave = ORDENACOES_CONTAS[ordenar_por]
+
+        if limite is not None:
+            escolher = heapq.nlargest if decrescente else heapq.nsmallest
+            selecionadas = iter(escolher(deslocamento + limite, selecionadas, key=chave))
+        else:
+            selecionadas = iter(sorted(selecionadas, key=chave, reverse=decrescente))
+
+    return islice(selecionadas, deslocamento, None if limite is None else deslocamento + limite)
 
 #gerador para ser usado nas transaçoes
-def gerador_transacao(transacoes, tipo_transacao):
-    
-    if tipo_transacao == "Saque":
-        transacoes = [transacao for transacao in transacoes if transacao["tipo"] == "Saque"]
-    elif tipo_transacao == "Deposito":
-        transacoes = [transacao for transacao in transacoes if transacao["tipo"] == "Deposito"]
-    
-    if len(transacoes) == 0:
-            print(f"Não existem transações do tipo {tipo_transacao} no extrato.")
-            return
-    
-    for transacao in transacoes:
+#Percorre o histórico sob demanda, sem copiar a lista, então a primeira linha sai sem esperar
+#o filtro terminar. Como o histórico está em ordem de data, a busca para assim que passa do período.
+def gerador_transacao(transacoes, tipo_transacao="", data_inicio=None, data_fim=None, valor_minimo=None,
+                      valor_maximo=None, deslocamento=0, limite=None, mais_recentes_primeiro=False):
+    filtrar_data = data_inicio is not None or data_fim is not None
+    encontradas = 0
+
+    for transacao in reversed(transacoes) if mais_recentes_primeiro else transacoes:
+        if filtrar_data:
+            data = datetime.strptime(transacao["data"], "%d/%m/%Y %H:%M:%S")
+
+            if data_fim is not None and data >= data_fim:
+                if mais_recentes_primeiro:
+                    continue
+                break
+
+            if data_inicio is not None and data < data_inicio:
+                if mais_recentes_primeiro:
+                    break
+                continue
+
+        if tipo_transacao and transacao["tipo"] != tipo_transacao:
+            continue
+
+        if valor_minimo is not None and transacao["valor"] < valor_minimo:
+            continue
+
+        if valor_maximo is not None and transacao["valor"] > valor_maximo:
+            continue
+
+        encontradas += 1
+
+        if encontradas <= deslocamento:
+            continue
+
         yield transacao
 
+        if limite is not None and encontradas >= deslocamento + limite:
+            return
+
+    if encontradas == 0:
+        print(f"Não existem transações do tipo {tipo_transacao} no extrato.")
+
+def escrever_em_blocos(linhas, tamanho_bloco=1000):
+    #Junta as linhas e faz uma única escrita por bloco, em vez de um print por linha
+    bloco = []
+
+    for linha in linhas:
+        bloco.append(linha)
+
+        if len(bloco) >= tamanho_bloco:
+            sys.stdout.write("".join(bloco))
+            bloco.clear()
+
+    sys.stdout.write("".join(bloco))
+    sys.stdout.flush()
+
 def menu(titulo):
     # Menu de opcoes
     titulo_formatado = "" + titulo.center(len(titulo) + 20, "=")
@@ -233,6 +540,7 @@ def menu(titulo):
     [4] -> Cadastrar Cliente
     [5] -> Cadastrar Conta Corrente
     [6] -> Listar Contas
+    [7] -> Métricas
     [0] -> Sair
     '''
     ))
@@ -240,8 +548,9 @@ def menu(titulo):
     return opcao
 
 @decorador_log
+@metricas.medir
 def sacar(clientes):
-    cpf = input(f"Informe o seu CPF:")
+    cpf = ler_entrada(f"Informe o seu CPF:")
     
     # Valida se o cliente está cadastrado
     cliente = filtrar_clientes(cpf, clientes)
@@ -251,21 +560,25 @@ def sacar(clientes):
         return
     
     #valida se o cliente possui uma conta
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print("\n@@@ Operação falhou! Cliente não possui conta cadastrada. @@@\n")
         return
     
-    valor = float(input(f"Informe o valor do saque:\n"))
+    valor = para_centavos(input(f"Informe o valor do saque:\n"))
 
     transacao = Saque(valor)
 
-    cliente.realizar_transacao(conta, transacao)
+    resultado = cliente.realizar_transacao(conta, transacao)
+    apresentador.exibir(transacao, resultado)
+
+    return resultado
 
 @decorador_log
+@metricas.medir
 def depositar(clientes):
-    cpf = input(f"Informe o seu CPF:")
+    cpf = ler_entrada(f"Informe o seu CPF:")
     
     # Valida se o cliente está cadastrado
     cliente = filtrar_clientes(cpf, clientes)
@@ -275,36 +588,48 @@ def depositar(clientes):
         return
     
     #valida se o cliente possui uma conta
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print("\nOperação falhou! Cliente não possui conta cadastrada.\n")
         return
     
-    valor = float(input(f"Informe o valor do depósito:\n"))
+    valor = para_centavos(input(f"Informe o valor do depósito:\n"))
 
     transacao = Deposito(valor)
 
-    cliente.realizar_transacao(conta, transacao)
+    resultado = cliente.realizar_transacao(conta, transacao)
+    apresentador.exibir(transacao, resultado)
+
+    return resultado
 
 #@decorador_log
 def filtrar_clientes(cpf, clientes):
-    for cliente in clientes:
-        cliente_existe = cliente.cpf == cpf
+    return clientes.buscar(cpf)
 
-        if cliente_existe:
-            return cliente
+def recuperar_conta_cliente(cliente, numero=None, agencia=AGENCIA_PADRAO):
+    #Sem número, usa a primeira conta cadastrada do cliente
+    if numero is None:
+        return next(iter(cliente.contas.values()), None)
 
-def recuperar_conta_cliente(cliente):
+    return cliente.contas.get((agencia, numero))
 
-    if not cliente.contas:
-        return
-    
-    return cliente.contas[0]
+def selecionar_conta(cliente):
+    #Pergunta o número da conta apenas quando o cliente tem mais de uma
+    if len(cliente.contas) <= 1:
+        return recuperar_conta_cliente(cliente)
+
+    numero = ler_entrada("Informe o número da conta:\n").strip()
+
+    if not numero.isdigit():
+        return None
+
+    return recuperar_conta_cliente(cliente, int(numero))
 
 @decorador_log
+@metricas.medir
 def cadastrar_cliente(clientes):
-    cpf = input("Informe o CPF do cliente:\n")
+    cpf = ler_entrada("Informe o CPF do cliente:\n")
 
     cliente = filtrar_clientes(cpf, clientes)
 
@@ -312,19 +637,22 @@ def cadastrar_cliente(clientes):
         print("Cliente já cadastrado.")
         return
     
-    nome = input("Informe o nome do cliente:\n")
-    endereco = input("Informe o endereço do cliente:\n")
-    data_nasc = input("Informe a data de nascimento do cliente:\n")
+    nome = ler_entrada("Informe o nome do cliente:\n")
+    endereco = ler_entrada("Informe o endereço do cliente:\n")
+    data_nasc = ler_entrada("Informe a data de nascimento do cliente:\n")
 
     cliente = PessoaFisica(endereco, cpf, nome, data_nasc)
 
-    print("\nCliente cadastrado com sucesso\n")
+    if not clientes.adicionar(cliente):
+        print("Cliente já cadastrado.")
+        return
 
-    clientes.append(cliente)
+    print("\nCliente cadastrado com sucesso\n")
 
 @decorador_log
-def cadastrar_conta(numero, clientes, contas):
-    cpf = input("Informe o CPF do cliente:\n")
+@metricas.medir
+def cadastrar_conta(numeros_conta, clientes, contas):
+    cpf = ler_entrada("Informe o CPF do cliente:\n")
 
     cliente = filtrar_clientes(cpf, clientes)
 
@@ -332,27 +660,66 @@ def cadastrar_conta(numero, clientes, contas):
         print(f"\n @@@ Operação falhou! Cliente não cadastrado para o CPF: {cpf}. @@@\n")
         return    
     
-    conta = ContaCorrente.nova_conta(numero, cliente)
-    contas.append(conta)
-    cliente.contas.append(conta)
+    #O número só é retirado da sequência depois de validar o cliente
+    conta = ContaCorrente.nova_conta(next(numeros_conta), cliente)
+
+    if not contas.adicionar(conta):
+        print(f"\n @@@ Operação falhou! Conta {conta.numero} já cadastrada. @@@\n")
+        return
+
+    cliente.adicionar_conta(conta)
 
     print(f"\n @@@ Conta cadastrada para o cliente {cliente.nome}  @@@\n")
 
 @decorador_log
+@metricas.medir
 def listar_contas(contas):
+    titular = ler_entrada("Filtrar por titular: (ENTER) para todos.\n").strip()
+    saldo_minimo = ler_entrada("Saldo mínimo: (ENTER) para qualquer saldo.\n").strip()
+    ordem = ler_entrada("Ordenar por: (T) titular, (S) maior saldo, (ENTER) número da conta.\n").strip().upper()
+    pagina = ler_entrada(f"Página de {TAMANHO_PAGINA_CONTAS} contas: (ENTER) para todas.\n").strip()
+
     print("\n====== Contas Cadastradas ======\n")
 
     if len(contas) == 0:
         print("@@@ Operação falhou! Nenhuma conta cadastrada! @@@ \n")
         return
 
-    for conta in IteradorConta(contas):
-        print(conta)
+    try:
+        saldo_minimo = para_centavos(saldo_minimo) if saldo_minimo else None
+        pagina = int(pagina) if pagina else None
+    except ValueError:
+        print("\n@@@ Operação falhou! Valor inválido! @@@\n")
+        return
+
+    if pagina is not None and pagina < 1:
+        print("\n@@@ Operação falhou! Página inválida! @@@\n")
+        return
+
+    selecionadas = selecionar_contas(
+        contas,
+        titular,
+        saldo_minimo,
+        ordenar_por={"T": "titular", "S": "saldo"}.get(ordem),
+        decrescente=ordem == "S",
+        deslocamento=(pagina - 1) * TAMANHO_PAGINA_CONTAS if pagina else 0,
+        limite=TAMANHO_PAGINA_CONTAS if pagina else None,
+    )
+
+    #As linhas vêm do cache e saem em blocos, com uma escrita por bloco
+    linhas = IteradorConta(selecionadas, contas.linhas)
+    escrever_em_blocos(f"{linha}\n" for linha in linhas)
+
+    if linhas.contador == 0:
+        print("\n Nenhuma conta encontrada.\n")
 
 @decorador_log
+@metricas.medir
 def exibir_extrato(clientes):
-    cpf = input("Informe o seu CPF:\n")
-    tipo_transacao = input("Informe o tipo de transação: (S) Saque, (D) Deposito, (ENTER) para todas.\n")
+    cpf = ler_entrada("Informe o seu CPF:\n")
+    tipo_transacao = ler_entrada("Informe o tipo de transação: (S) Saque, (D) Deposito, (ENTER) para todas.\n")
+
+    ordem = ler_entrada("Informe a ordem: (R) mais recentes primeiro, (ENTER) mais antigas primeiro.\n")
 
     if tipo_transacao != "":
         tipo_transacao = "Saque" if tipo_transacao == "S" else "Deposito"
@@ -363,7 +730,7 @@ def exibir_extrato(clientes):
         print("\n@@@ Operação falhou! Cliente não cadastrado! @@@\n")
         return
     
-    conta = recuperar_conta_cliente(cliente)
+    conta = selecionar_conta(cliente)
 
     if not conta:
         print(f"\n@@@ Operação falhou! Conta não cadastrada para o CPF: {cliente.cpf}! @@@\n")
@@ -374,18 +741,37 @@ def exibir_extrato(clientes):
     print(f"\n====== Extrato conta número: {conta.numero} ======\n")
 
     if len(transacoes) > 0:
-        for transacao in gerador_transacao(transacoes, tipo_transacao):
-             print(f"{transacao["tipo"]}     R${transacao["valor"]:.2f}      {transacao["data"]}")
+        transacoes_filtradas = gerador_transacao(
+            transacoes, tipo_transacao, mais_recentes_primeiro=ordem.upper() == "R"
+        )
+        escrever_em_blocos(
+            f"{transacao["tipo"]}     R${formatar_reais(transacao["valor"])}      {transacao["data"]}\n"
+            for transacao in transacoes_filtradas
+        )
     
     else:
         print("\n Conta ainda não possui transações.\n")
 
-    print(f"\n Saldo: R$ {conta.saldo:.2f}\n")
+    historico = conta.historico
+
+    for tipo in (Deposito.__name__, Saque.__name__):
+        print(f"\n {tipo}s: {historico.quantidade_transacoes(tipo)} | Total: R$ {formatar_reais(historico.total_transacoes(tipo))}")
+
+    print(f"\n Saldo: R$ {formatar_reais(conta.saldo)}\n")
     print(f"\n====== Fim Extrato ======\n")
 
+def exibir_metricas(caminho="metricas.prom"):
+    print("\n====== Métricas ======\n")
+    print(metricas.registro.resumo())
+
+    metricas.registro.exportar_prometheus(caminho)
+    print(f"\n=== Métricas exportadas para {caminho} ===\n")
+
 def main():    
-    clientes = []
-    contas = []
+    clientes = ClienteRegistry()
+    contas = ContaRegistry()
+    #Sequência de números de conta, nunca reaproveitados
+    numeros_conta = count(1)
     
     while True:
         # Menu de opcoes
@@ -409,17 +795,21 @@ def main():
 
         #Operação cadastrar conta
         elif(opcao == 5):
-            numero = len(contas) + 1
-            cadastrar_conta(numero, clientes, contas)
+            cadastrar_conta(numeros_conta, clientes, contas)
 
         #Operação listar contas
         elif(opcao == 6):
             listar_contas(contas)
 
+        #Operação exibir métricas
+        elif(opcao == 7):
+            exibir_metricas()
+
         elif(opcao == 0):
             break
 
         else:
             print("Operação falhou. Digite uma opção válida.")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
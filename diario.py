@@ -0,0 +1,262 @@
+#Diário persistente (write-ahead log) de clientes, contas e transações
+#
+#Cada registro é gravado como: tipo (1 byte), tamanho do conteúdo (4 bytes), conteúdo e CRC32 (4 bytes).
+#Os campos de texto do conteúdo têm cada um o seu tamanho (4 bytes) na frente, então qualquer
+#caractere é aceito. Registros antigos, com tamanho de 2 bytes e campos separados por \x1f, não
+#têm o bit FORMATO_LONGO no tipo e continuam sendo lidos.
+#Os registros ficam em um buffer e são gravados com um único fsync por grupo (a cada
+#tamanho_grupo registros ou intervalo_sincronizacao segundos, o que vier primeiro).
+#Periodicamente o estado completo (clientes e saldos) é salvo em um snapshot junto com a
+#posição do diário, assim a recuperação só precisa reaplicar os registros posteriores. O estado
+#é copiado e gravado em disco por uma thread, fora do caminho das transações; durante a cópia
+#quem chama impede novos registros.
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+CLIENTE = 1
+CONTA = 2
+TRANSACAO = 3
+
+#Marca no byte do tipo os registros gravados com tamanhos de 4 bytes
+FORMATO_LONGO = 0x80
+
+_CABECALHO = struct.Struct("<BI")
+_CABECALHO_ANTIGO = struct.Struct("<BH")
+_CRC = struct.Struct("<I")
+#Número e instante da abertura; os registros antigos só têm o número
+_CONTA = struct.Struct("<Id")
+_CONTA_ANTIGO = struct.Struct("<I")
+_TAMANHO_CAMPO = struct.Struct("<I")
+_TRANSACAO = struct.Struct("<IBqd")
+
+_SEPARADOR = "\x1f"
+
+def _codificar_campos(campos):
+    conteudo = bytearray()
+
+    for campo in campos:
+        dados = campo.encode("utf-8")
+        conteudo += _TAMANHO_CAMPO.pack(len(dados))
+        conteudo += dados
+
+    return bytes(conteudo)
+
+def _decodificar_campos(conteudo):
+    campos = []
+    posicao = 0
+
+    while posicao < len(conteudo):
+        (tamanho,) = _TAMANHO_CAMPO.unpack_from(conteudo, posicao)
+        posicao += _TAMANHO_CAMPO.size
+        campos.append(conteudo[posicao:posicao + tamanho].decode("utf-8"))
+        posicao += tamanho
+
+    return tuple(campos)
+
+class DiarioTransacoes:
+    ARQUIVO_DIARIO = "diario.bin"
+    ARQUIVO_SNAPSHOT = "snapshot.bin"
+
+    def __init__(self, diretorio, tamanho_grupo=512, intervalo_sincronizacao=0.05, intervalo_snapshot=100_000):
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._diretorio = diretorio
+        self._caminho_diario = os.path.join(diretorio, self.ARQUIVO_DIARIO)
+        self._caminho_snapshot = os.path.join(diretorio, self.ARQUIVO_SNAPSHOT)
+        self._tamanho_grupo = tamanho_grupo
+        self._intervalo_snapshot = intervalo_snapshot
+
+        self._recuperado = self._ler()
+
+        self._arquivo = open(self._caminho_diario, "ab")
+        self._buffer = bytearray()
+        self._pendentes = 0
+        self._transacoes_desde_snapshot = 0
+        self._trava = threading.Lock()
+        self._gravacao_snapshot = None
+
+        #Garante que um registro isolado não espere mais que intervalo_sincronizacao para ir ao disco
+        self._parar = threading.Event()
+        self._sincronizador = threading.Thread(
+            target=self._sincronizar_periodicamente, args=(intervalo_sincronizacao,), name="diario", daemon=True
+        )
+        self._sincronizador.start()
+
+    def recuperar(self):
+        #Retorna (estado do último snapshot ou None, registros posteriores ao snapshot) uma única vez
+        recuperado, self._recuperado = self._recuperado, (None, [])
+        return recuperado
+
+    def _ler(self):
+        estado = None
+        posicao_inicial = 0
+
+        if os.path.exists(self._caminho_snapshot):
+            with open(self._caminho_snapshot, "rb") as arquivo:
+                snapshot = pickle.load(arquivo)
+
+            estado = snapshot["estado"]
+            posicao_inicial = snapshot["posicao"]
+
+        if not os.path.exists(self._caminho_diario):
+            return estado, []
+
+        with open(self._caminho_diario, "rb") as arquivo:
+            arquivo.seek(posicao_inicial)
+            dados = arquivo.read()
+
+        registros = []
+        posicao = 0
+
+        while posicao < len(dados):
+            cabecalho = _CABECALHO if dados[posicao] & FORMATO_LONGO else _CABECALHO_ANTIGO
+
+            if posicao + cabecalho.size > len(dados):
+                break
+
+            tipo, tamanho = cabecalho.unpack_from(dados, posicao)
+            inicio = posicao + cabecalho.size
+            fim = inicio + tamanho + _CRC.size
+
+            if fim > len(dados):
+                break
+
+            conteudo = bytes(dados[inicio:inicio + tamanho])
+            (crc,) = _CRC.unpack_from(dados, inicio + tamanho)
+
+            if zlib.crc32(conteudo) != crc:
+                break
+
+            registros.append((tipo & ~FORMATO_LONGO, self._decodificar(tipo, conteudo)))
+            posicao = fim
+
+        #Descarta um registro incompleto no final (gravação interrompida)
+        if posicao < len(dados):
+            with open(self._caminho_diario, "r+b") as arquivo:
+                arquivo.truncate(posicao_inicial + posicao)
+
+        return estado, registros
+
+    @staticmethod
+    def _decodificar(tipo, conteudo):
+        longo = tipo & FORMATO_LONGO
+        tipo &= ~FORMATO_LONGO
+
+        if tipo == TRANSACAO:
+            return _TRANSACAO.unpack(conteudo)
+
+        if tipo == CONTA:
+            if not longo:
+                (numero,) = _CONTA_ANTIGO.unpack_from(conteudo)
+                return numero, conteudo[_CONTA_ANTIGO.size:].decode("utf-8"), None
+
+            numero, aberta_em = _CONTA.unpack_from(conteudo)
+            return numero, conteudo[_CONTA.size:].decode("utf-8"), aberta_em
+
+        if longo:
+            return _decodificar_campos(conteudo)
+
+        return tuple(conteudo.decode("utf-8").split(_SEPARADOR))
+
+    def _anexar(self, tipo, conteudo):
+        with self._trava:
+            self._buffer += _CABECALHO.pack(tipo | FORMATO_LONGO, len(conteudo))
+            self._buffer += conteudo
+            self._buffer += _CRC.pack(zlib.crc32(conteudo))
+            self._pendentes += 1
+
+            if tipo == TRANSACAO:
+                self._transacoes_desde_snapshot += 1
+
+            if self._pendentes >= self._tamanho_grupo:
+                self._sincronizar()
+
+    def registrar_cliente(self, cpf, nome, endereco, data_nasc):
+        self._anexar(CLIENTE, _codificar_campos((cpf, nome, endereco, data_nasc)))
+
+    def registrar_conta(self, numero, cpf, aberta_em):
+        self._anexar(CONTA, _CONTA.pack(numero, aberta_em) + cpf.encode("utf-8"))
+
+    def registrar_transacao(self, numero, tipo, centavos, instante):
+        self._anexar(TRANSACAO, _TRANSACAO.pack(numero, tipo, centavos, instante))
+
+    @property
+    def snapshot_pendente(self):
+        #Enquanto um snapshot está sendo gravado, o próximo espera
+        gravacao = self._gravacao_snapshot
+
+        if gravacao is not None and gravacao.is_alive():
+            return False
+
+        return self._transacoes_desde_snapshot >= self._intervalo_snapshot
+
+    def _sincronizar(self):
+        if not self._buffer:
+            return
+
+        self._arquivo.write(self._buffer)
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+        self._buffer.clear()
+        self._pendentes = 0
+
+    def sincronizar(self):
+        with self._trava:
+            self._sincronizar()
+
+    def _sincronizar_periodicamente(self, intervalo):
+        while not self._parar.wait(intervalo):
+            if self._pendentes:
+                self.sincronizar()
+
+    def posicao(self):
+        #Posição do fim do diário com tudo o que foi anexado já gravado no arquivo
+        with self._trava:
+            self._sincronizar()
+            return self._arquivo.tell()
+
+    def gravar_snapshot(self, copiar_estado):
+        #copiar_estado() roda na thread do snapshot e retorna (posição do diário, cópia do estado). Quem
+        #chama garante que nenhum registro é anexado entre a leitura da posição e a cópia, senão o
+        #registro ficaria fora do estado ou seria reaplicado sobre ele na recuperação.
+        #Verificado e iniciado sob a trava: chamadas simultâneas iniciam uma única gravação
+        with self._trava:
+            gravacao = self._gravacao_snapshot
+
+            if gravacao is not None and gravacao.is_alive():
+                return
+
+            self._transacoes_desde_snapshot = 0
+            self._gravacao_snapshot = threading.Thread(
+                target=self._gravar_snapshot, args=(copiar_estado,), name="snapshot", daemon=True
+            )
+            self._gravacao_snapshot.start()
+
+    def _gravar_snapshot(self, copiar_estado):
+        posicao, estado = copiar_estado()
+        temporario = f"{self._caminho_snapshot}.tmp"
+
+        with open(temporario, "wb") as arquivo:
+            pickle.dump({"posicao": posicao, "estado": estado}, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+        os.replace(temporario, self._caminho_snapshot)
+
+    def fechar(self):
+        if self._arquivo.closed:
+            return
+
+        self._parar.set()
+        self._sincronizador.join()
+
+        if self._gravacao_snapshot is not None:
+            self._gravacao_snapshot.join()
+
+        with self._trava:
+            self._sincronizar()
+            self._arquivo.close()
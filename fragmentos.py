@@ -0,0 +1,149 @@
+#Contas distribuídas entre processos (fragmentos) pelo número da conta
+#
+#Cada processo é dono de um subconjunto das contas (numero % quantidade_fragmentos) e de seus
+#históricos, então as transações de fragmentos diferentes executam em paralelo, fora do GIL
+#do processo principal. O RoteadorContas separa um lote de comandos por fragmento, envia cada
+#parte pelo seu Pipe e devolve os resultados na ordem original. Enviar lotes em vez de
+#comandos isolados dilui o custo de serialização e de troca de mensagens.
+#
+#Comandos: ("abrir", numero, cpf, nome), ("deposito", numero, centavos), ("saque", numero, centavos)
+#e ("saldo", numero), que devolve o saldo em centavos. Uma operação desconhecida devolve
+#"operacao_invalida" e um comando com argumentos inválidos devolve "comando_invalido"; uma falha
+#em um comando não interrompe o fragmento nem os demais comandos do lote.
+#As políticas de limites (formato de politicas.py) podem ser informadas para todos os fragmentos.
+import multiprocessing
+
+from desafio_date_time_sistema_bancario import ContaCorrente, ContextoBanco, Deposito, PessoaFisica, Saque
+
+def _executar_fragmento(conexao, politicas):
+    contas = {}
+    contexto = ContextoBanco()
+
+    if politicas is not None:
+        contexto.motor_politicas.definir(politicas)
+
+    def executar(comando):
+        operacao, numero, *argumentos = comando
+        conta = contas.get(numero)
+
+        if operacao == "abrir":
+            if conta is not None:
+                return "conta_ja_cadastrada"
+
+            cpf, nome = argumentos
+            cliente = PessoaFisica("", cpf, nome, "")
+            conta = contas[numero] = ContaCorrente.nova_conta(numero, cliente, contexto)
+            cliente.adicionar_conta(conta)
+
+            return "sucesso"
+
+        if conta is None:
+            return "conta_nao_cadastrada"
+
+        if operacao == "saldo":
+            return conta.saldo
+
+        if operacao == "deposito":
+            classe_transacao = Deposito
+        elif operacao == "saque":
+            classe_transacao = Saque
+        else:
+            return "operacao_invalida"
+
+        return conta.cliente.realizar_transacao(conta, classe_transacao(argumentos[0])).value
+
+    def executar_protegido(comando):
+        try:
+            return executar(comando)
+        except (IndexError, TypeError, ValueError):
+            return "comando_invalido"
+        except Exception:
+            return "erro_interno"
+
+    while True:
+        lote = conexao.recv()
+
+        if lote is None:
+            conexao.close()
+            return
+
+        conexao.send([executar_protegido(comando) for comando in lote])
+
+class RoteadorContas:
+    def __init__(self, quantidade_fragmentos=None, politicas=None):
+        self._quantidade = quantidade_fragmentos or multiprocessing.cpu_count()
+        self._conexoes = []
+        self._processos = []
+
+        for indice in range(self._quantidade):
+            local, remota = multiprocessing.Pipe()
+            processo = multiprocessing.Process(
+                target=_executar_fragmento, args=(remota, politicas), name=f"fragmento-{indice}", daemon=True
+            )
+            processo.start()
+            remota.close()
+
+            self._conexoes.append(local)
+            self._processos.append(processo)
+
+    @property
+    def quantidade_fragmentos(self):
+        return self._quantidade
+
+    def fragmento(self, numero):
+        return numero % self._quantidade
+
+    def executar_lote(self, comandos):
+        #Envia a parte de cada fragmento antes de esperar as respostas, para que executem juntos
+        partes = [[] for _ in range(self._quantidade)]
+        posicoes = [[] for _ in range(self._quantidade)]
+        resultados = [None] * len(comandos)
+
+        for posicao, comando in enumerate(comandos):
+            #Sem um número de conta inteiro não há fragmento: o comando falha sozinho, sem ser enviado
+            numero = comando[1] if isinstance(comando, (tuple, list)) and len(comando) > 1 else None
+
+            if isinstance(numero, bool) or not isinstance(numero, int):
+                resultados[posicao] = "comando_invalido"
+                continue
+
+            fragmento = self.fragmento(numero)
+            partes[fragmento].append(comando)
+            posicoes[fragmento].append(posicao)
+
+        for conexao, parte in zip(self._conexoes, partes):
+            if parte:
+                conexao.send(parte)
+
+        for conexao, parte, posicoes_parte in zip(self._conexoes, partes, posicoes):
+            if parte:
+                for posicao, resultado in zip(posicoes_parte, conexao.recv()):
+                    resultados[posicao] = resultado
+
+        return resultados
+
+    def abrir_conta(self, numero, cpf, nome):
+        return self.executar_lote([("abrir", numero, cpf, nome)])[0]
+
+    def depositar(self, numero, valor):
+        return self.executar_lote([("deposito", numero, valor)])[0]
+
+    def sacar(self, numero, valor):
+        return self.executar_lote([("saque", numero, valor)])[0]
+
+    def saldo(self, numero):
+        return self.executar_lote([("saldo", numero)])[0]
+
+    def fechar(self):
+        for conexao in self._conexoes:
+            conexao.send(None)
+            conexao.close()
+
+        for processo in self._processos:
+            processo.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
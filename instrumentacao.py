@@ -0,0 +1,133 @@
+#Instrumentação das operações do menu
+#
+#decorador_log mede a latência de cada chamada com relógio monotônico e envia um registro
+#estruturado para uma fila. Uma thread em segundo plano consome a fila e grava os registros
+#em lote, então a data só é formatada fora da operação. Abaixo do nível configurado o decorador
+#apenas repassa a chamada. As funções do menu incluem a digitação do usuário, por isso não
+#alimentam o registro de métricas: as operações são medidas com metricas.medir.
+import atexit
+import functools
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+DEBUG = 10
+INFO = 20
+DESLIGADO = 100
+
+#Registros com nível abaixo deste valor não são gerados
+nivel_log = INFO
+
+_FIM = object()
+
+def formatar_texto(registro):
+    nome_funcao, instante, duracao_ns, erro = registro
+    data = datetime.fromtimestamp(instante).strftime("%d/%m/%Y %H:%M:%S")
+    linha = f"#LOG: Executou a função --> {nome_funcao} | Data --> {data} | Duração --> {duracao_ns / 1_000_000:.3f} ms"
+
+    if erro:
+        linha += f" | Erro --> {erro}"
+
+    return linha + "\n"
+
+def formatar_json(registro):
+    nome_funcao, instante, duracao_ns, erro = registro
+
+    return json.dumps({"funcao": nome_funcao, "instante": instante, "duracao_ns": duracao_ns, "erro": erro}) + "\n"
+
+class EscritorLog:
+    #Grava os registros recebidos pela fila, agrupando tudo o que estiver pendente em uma única escrita
+    def __init__(self, destino=None, formatador=formatar_texto):
+        self._destino = destino if destino is not None else sys.stdout
+        self._formatador = formatador
+        self._fila = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._executar, name="escritor-log", daemon=True)
+        self._thread.start()
+
+    def enviar(self, registro):
+        self._fila.put(registro)
+
+    def _executar(self):
+        while True:
+            registro = self._fila.get()
+            linhas = []
+
+            while registro is not _FIM:
+                linhas.append(self._formatador(registro))
+
+                try:
+                    registro = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+
+            if linhas:
+                self._destino.write("".join(linhas))
+                self._destino.flush()
+
+            if registro is _FIM:
+                return
+
+    def fechar(self):
+        if self._thread.is_alive():
+            self._fila.put(_FIM)
+            self._thread.join()
+
+_escritor = None
+_trava_escritor = threading.Lock()
+
+def obter_escritor():
+    #Cria o escritor na primeira chamada registrada, assim importar o módulo não inicia threads
+    global _escritor
+
+    if _escritor is None:
+        with _trava_escritor:
+            if _escritor is None:
+                _escritor = EscritorLog()
+                atexit.register(_escritor.fechar)
+
+    return _escritor
+
+def configurar_log(nivel=INFO, destino=None, formatador=formatar_texto):
+    global nivel_log, _escritor
+
+    with _trava_escritor:
+        if _escritor is not None:
+            _escritor.fechar()
+
+        nivel_log = nivel
+        _escritor = EscritorLog(destino, formatador) if nivel < DESLIGADO else None
+
+        if _escritor is not None:
+            atexit.register(_escritor.fechar)
+
+#decorador de log
+def decorador_log(funcao=None, *, nivel=INFO):
+    #Pode ser usado como @decorador_log ou @decorador_log(nivel=DEBUG)
+    if funcao is None:
+        return functools.partial(decorador_log, nivel=nivel)
+
+    nome_funcao = funcao.__name__
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        if nivel < nivel_log:
+            return funcao(*args, **kwargs)
+
+        erro = None
+        inicio = time.perf_counter_ns()
+
+        try:
+            return funcao(*args, **kwargs)
+
+        except BaseException as excecao:
+            erro = excecao.__class__.__name__
+            raise
+
+        finally:
+            duracao_ns = time.perf_counter_ns() - inicio
+            obter_escritor().enviar((nome_funcao, time.time(), duracao_ns, erro))
+
+    return wrapper
@@ -0,0 +1,207 @@
+#Processamento em lote de depósitos e saques (ex.: liquidação noturna de arquivos CSV/JSONL)
+#
+#Cada registro é (cpf, tipo, valor, timestamp, conta), com tipo "deposito" ou "saque". A conta
+#(número, opcional) escolhe entre as contas do cliente; sem ela, vale a primeira conta cadastrada.
+#Uma conta que não é um número conta como falha conta_invalida.
+#As transações passam pelas mesmas regras da ContaCorrente (limite, quantidade diária e saldo)
+#e o resultado é acumulado em um RelatorioLote, sem nenhuma saída no console.
+#O timestamp (ISO 8601 ou segundos desde a época, opcional) é a data da transação no histórico e
+#nos limites. O histórico de cada conta fica em ordem de data, então um timestamp anterior à
+#última transação da conta (ou à abertura dela) ou no futuro é recusado. Registros malformados
+#(linha CSV curta, JSON inválido, campo ausente) contam como falha registro_invalido e o lote continua.
+#O valor em reais é convertido direto do texto do arquivo para centavos, sem passar por float.
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+
+from desafio_date_time_sistema_bancario import (
+    Deposito,
+    Saque,
+    filtrar_clientes,
+    formatar_reais,
+    para_centavos,
+    recuperar_conta_cliente,
+)
+
+TRANSACOES = {
+    "deposito": Deposito,
+    "saque": Saque,
+}
+
+class RelatorioLote:
+    __slots__ = ("processados", "aplicados", "falhas", "total_depositado", "total_sacado")
+
+    def __init__(self):
+        self.processados = 0
+        self.aplicados = 0
+        self.falhas = Counter()
+        self.total_depositado = 0
+        self.total_sacado = 0
+
+    def __str__(self):
+        linhas = [
+            f"Processados:\t{self.processados}",
+            f"Aplicados:\t{self.aplicados}",
+            f"Depositado:\tR$ {formatar_reais(self.total_depositado)}",
+            f"Sacado:\t\tR$ {formatar_reais(self.total_sacado)}",
+        ]
+
+        for motivo, quantidade in self.falhas.most_common():
+            linhas.append(f"Falha {motivo}:\t{quantidade}")
+
+        return "\n".join(linhas)
+
+#Gerado pelos leitores no lugar de um registro malformado
+REGISTRO_INVALIDO = None
+
+def ler_csv(arquivo):
+    #Aceita um cabeçalho opcional (cpf,tipo,valor,timestamp,conta)
+    for linha in csv.reader(arquivo):
+        if not linha or linha[0] == "cpf":
+            continue
+
+        if len(linha) < 3:
+            yield REGISTRO_INVALIDO
+            continue
+
+        cpf, tipo, valor, *opcionais = linha
+        timestamp, conta = (opcionais + ["", ""])[:2]
+        yield cpf, tipo, valor, timestamp or None, conta or None
+
+def ler_jsonl(arquivo):
+    for linha in arquivo:
+        if not linha.strip():
+            continue
+
+        try:
+            registro = json.loads(linha)
+            yield registro["cpf"], registro["tipo"], registro["valor"], registro.get("timestamp"), registro.get("conta")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            yield REGISTRO_INVALIDO
+
+def ler_timestamp(timestamp):
+    #Data local sem fuso, como as do histórico; None quando o registro não informa o timestamp
+    if timestamp is None:
+        return None
+
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return datetime.fromtimestamp(timestamp)
+
+    texto = str(timestamp).strip()
+
+    try:
+        return datetime.fromtimestamp(float(texto))
+    except ValueError:
+        data = datetime.fromisoformat(texto)
+
+    return data.astimezone().replace(tzinfo=None) if data.tzinfo else data
+
+def ler_numero_conta(conta):
+    #None quando o registro não informa a conta
+    if conta is None:
+        return None
+
+    if isinstance(conta, bool):
+        raise ValueError(conta)
+
+    if isinstance(conta, int):
+        return conta
+
+    texto = str(conta).strip()
+
+    if not texto.isdigit():
+        raise ValueError(conta)
+
+    return int(texto)
+
+def processar_lote(registros, clientes):
+    relatorio = RelatorioLote()
+
+    #Cliente e conta resolvidos por (CPF, número da conta), para não repetir a busca nos registros seguintes
+    contas_resolvidas = {}
+    #Data (em segundos) da última transação de cada conta, ou da abertura, consultada uma vez por conta
+    ultimos_instantes = {}
+
+    for registro in registros:
+        relatorio.processados += 1
+
+        if registro is REGISTRO_INVALIDO:
+            relatorio.falhas["registro_invalido"] += 1
+            continue
+
+        #Registros de 4 campos (sem conta), do formato anterior, continuam aceitos
+        cpf, tipo, valor, timestamp, *conta = registro
+
+        try:
+            numero = ler_numero_conta(conta[0] if conta else None)
+        except ValueError:
+            relatorio.falhas["conta_invalida"] += 1
+            continue
+
+        resolvido = contas_resolvidas.get((cpf, numero))
+
+        if resolvido is None:
+            cliente = filtrar_clientes(cpf, clientes)
+            conta = recuperar_conta_cliente(cliente, numero) if cliente else None
+            resolvido = contas_resolvidas[(cpf, numero)] = (cliente, conta)
+
+        cliente, conta = resolvido
+
+        if not cliente:
+            relatorio.falhas["cliente_nao_cadastrado"] += 1
+            continue
+
+        if not conta:
+            relatorio.falhas["conta_nao_cadastrada"] += 1
+            continue
+
+        classe_transacao = TRANSACOES.get(str(tipo).strip().lower())
+
+        if not classe_transacao:
+            relatorio.falhas["tipo_invalido"] += 1
+            continue
+
+        try:
+            transacao = classe_transacao(para_centavos(valor))
+        except (ValueError, TypeError):
+            relatorio.falhas["valor_invalido"] += 1
+            continue
+
+        try:
+            data = ler_timestamp(timestamp)
+        except (ValueError, OverflowError, OSError):
+            relatorio.falhas["timestamp_invalido"] += 1
+            continue
+
+        if data is not None:
+            if data > datetime.now():
+                relatorio.falhas["timestamp_invalido"] += 1
+                continue
+
+            if conta not in ultimos_instantes:
+                ultimo = conta.historico.ultimo_instante()
+                ultimos_instantes[conta] = conta.aberta_em if ultimo is None else ultimo
+
+            ultimo = ultimos_instantes[conta]
+
+            if ultimo is not None and data.timestamp() < ultimo:
+                relatorio.falhas["timestamp_fora_de_ordem"] += 1
+                continue
+
+        resultado = cliente.realizar_transacao(conta, transacao, data)
+
+        if not resultado:
+            relatorio.falhas[resultado.value] += 1
+            continue
+
+        ultimos_instantes[conta] = (data or datetime.now()).timestamp()
+
+        relatorio.aplicados += 1
+
+        if classe_transacao is Deposito:
+            relatorio.total_depositado += transacao.valor
+        else:
+            relatorio.total_sacado += transacao.valor
+
+    return relatorio
@@ -0,0 +1,243 @@
+#Métricas por operação: quantidade de chamadas, falhas por motivo e histograma de latência
+#
+#O histograma usa faixas exponenciais fixas (1 µs a ~34 s), então a memória por operação
+#não cresce com o número de chamadas. Os percentis são estimados pelo limite superior da faixa.
+#O tempo de espera em ler_entrada (input do menu) é descontado das medições, e as funções que
+#devolvem um iterador são medidas com medir_iteracao, enquanto o iterador é consumido.
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+#Limites superiores das faixas do histograma, em nanossegundos
+LIMITES_NS = tuple(1_000 * 2 ** expoente for expoente in range(26))
+
+class Histograma:
+    __slots__ = ("contagens", "soma_ns")
+
+    def __init__(self):
+        #A última posição guarda as observações acima do maior limite
+        self.contagens = [0] * (len(LIMITES_NS) + 1)
+        self.soma_ns = 0
+
+    def observar(self, duracao_ns):
+        self.contagens[bisect_left(LIMITES_NS, duracao_ns)] += 1
+        self.soma_ns += duracao_ns
+
+    @property
+    def total(self):
+        return sum(self.contagens)
+
+    def percentil(self, fracao):
+        total = self.total
+
+        if total == 0:
+            return 0
+
+        alvo = fracao * total
+        acumulado = 0
+
+        for indice, quantidade in enumerate(self.contagens):
+            acumulado += quantidade
+
+            if acumulado >= alvo:
+                return LIMITES_NS[indice] if indice < len(LIMITES_NS) else float("inf")
+
+        return float("inf")
+
+class MetricasOperacao:
+    __slots__ = ("chamadas", "falhas", "latencia")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.falhas = Counter()
+        self.latencia = Histograma()
+
+class RegistroMetricas:
+    def __init__(self):
+        self.ativo = True
+        self._operacoes = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, operacao, duracao_ns, motivo_falha=None):
+        if not self.ativo:
+            return
+
+        with self._trava:
+            metricas = self._operacoes.get(operacao)
+
+            if metricas is None:
+                metricas = self._operacoes[operacao] = MetricasOperacao()
+
+            metricas.chamadas += 1
+            metricas.latencia.observar(duracao_ns)
+
+            if motivo_falha:
+                metricas.falhas[motivo_falha] += 1
+
+    def operacoes(self):
+        with self._trava:
+            return dict(self._operacoes)
+
+    def resumo(self):
+        linhas = [f"{'Operação':<24}{'Chamadas':>10}{'Falhas':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+
+        for operacao, metricas in sorted(self.operacoes().items()):
+            latencia = metricas.latencia
+            linhas.append(
+                f"{operacao:<24}{metricas.chamadas:>10}{sum(metricas.falhas.values()):>8}"
+                f"{latencia.percentil(0.50) / 1e6:>10.3f}{latencia.percentil(0.95) / 1e6:>10.3f}{latencia.percentil(0.99) / 1e6:>10.3f}"
+            )
+
+            for motivo, quantidade in metricas.falhas.most_common():
+                linhas.append(f"    falha {motivo}: {quantidade}")
+
+        return "\n".join(linhas)
+
+    def exportar_prometheus(self, caminho):
+        linhas = [
+            "# HELP banco_operacao_chamadas_total Chamadas por operação.",
+            "# TYPE banco_operacao_chamadas_total counter",
+        ]
+        operacoes = sorted(self.operacoes().items())
+
+        for operacao, metricas in operacoes:
+            linhas.append(f'banco_operacao_chamadas_total{{operacao="{operacao}"}} {metricas.chamadas}')
+
+        linhas += [
+            "# HELP banco_operacao_falhas_total Falhas por operação e motivo.",
+            "# TYPE banco_operacao_falhas_total counter",
+        ]
+
+        for operacao, metricas in operacoes:
+            for motivo, quantidade in sorted(metricas.falhas.items()):
+                linhas.append(f'banco_operacao_falhas_total{{operacao="{operacao}",motivo="{motivo}"}} {quantidade}')
+
+        linhas += [
+            "# HELP banco_operacao_latencia_segundos Latência por operação.",
+            "# TYPE banco_operacao_latencia_segundos histogram",
+        ]
+
+        for operacao, metricas in operacoes:
+            acumulado = 0
+
+            for limite, quantidade in zip(LIMITES_NS, metricas.latencia.contagens):
+                acumulado += quantidade
+                linhas.append(f'banco_operacao_latencia_segundos_bucket{{operacao="{operacao}",le="{limite / 1e9:g}"}} {acumulado}')
+
+            linhas.append(f'banco_operacao_latencia_segundos_bucket{{operacao="{operacao}",le="+Inf"}} {metricas.chamadas}')
+            linhas.append(f'banco_operacao_latencia_segundos_sum{{operacao="{operacao}"}} {metricas.latencia.soma_ns / 1e9:g}')
+            linhas.append(f'banco_operacao_latencia_segundos_count{{operacao="{operacao}"}} {metricas.chamadas}')
+
+        #Grava em um arquivo temporário e substitui, para o coletor nunca ler um arquivo pela metade
+        temporario = f"{caminho}.tmp"
+
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write("\n".join(linhas) + "\n")
+
+        os.replace(temporario, caminho)
+
+#Registro usado pelas operações do Banco e do menu e por Transacao.registrar
+registro = RegistroMetricas()
+
+#Tempo acumulado em ler_entrada por thread, descontado das medições em andamento
+_espera = threading.local()
+
+def _espera_ns():
+    return getattr(_espera, "total_ns", 0)
+
+def ler_entrada(mensagem=""):
+    #input() cujo tempo de digitação não conta na latência das operações medidas
+    inicio = time.perf_counter_ns()
+
+    try:
+        return input(mensagem)
+    finally:
+        _espera.total_ns = _espera_ns() + time.perf_counter_ns() - inicio
+
+def motivo_falha(resultado):
+    #Resultados com .value (ResultadoOperacao) que avaliam como falso contam como falha
+    if resultado is not None and not resultado and hasattr(resultado, "value"):
+        return resultado.value
+
+def motivo_excecao(excecao):
+    #Exceções com código do motivo (ex.: ErroBanco) contam pelo código, as demais pelo nome da classe
+    return getattr(excecao, "codigo", None) or excecao.__class__.__name__
+
+def medir(funcao):
+    #Mede uma função ou método, identificado pelo nome qualificado (ex.: Saque.registrar)
+    nome_operacao = funcao.__qualname__
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        if not registro.ativo:
+            return funcao(*args, **kwargs)
+
+        motivo = None
+        espera = _espera_ns()
+        inicio = time.perf_counter_ns()
+
+        try:
+            resultado = funcao(*args, **kwargs)
+            motivo = motivo_falha(resultado)
+            return resultado
+
+        except BaseException as excecao:
+            motivo = motivo_excecao(excecao)
+            raise
+
+        finally:
+            duracao_ns = time.perf_counter_ns() - inicio - (_espera_ns() - espera)
+            registro.registrar(nome_operacao, duracao_ns, motivo)
+
+    return wrapper
+
+def medir_iteracao(funcao):
+    #Para funções que devolvem um iterador (ex.: extrato): soma o tempo da chamada e o de cada
+    #próximo item, registrado quando o iterador termina ou é descartado
+    nome_operacao = funcao.__qualname__
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        if not registro.ativo:
+            return funcao(*args, **kwargs)
+
+        inicio = time.perf_counter_ns()
+
+        try:
+            iterador = iter(funcao(*args, **kwargs))
+        except BaseException as excecao:
+            registro.registrar(nome_operacao, time.perf_counter_ns() - inicio, motivo_excecao(excecao))
+            raise
+
+        return _medir_iterador(nome_operacao, iterador, time.perf_counter_ns() - inicio)
+
+    return wrapper
+
+def _medir_iterador(nome_operacao, iterador, duracao_ns):
+    motivo = None
+
+    try:
+        while True:
+            inicio = time.perf_counter_ns()
+
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            finally:
+                duracao_ns += time.perf_counter_ns() - inicio
+
+            yield item
+
+    except GeneratorExit:
+        raise
+
+    except BaseException as excecao:
+        motivo = motivo_excecao(excecao)
+        raise
+
+    finally:
+        registro.registrar(nome_operacao, duracao_ns, motivo)
@@ -0,0 +1,83 @@
+#Sequência de números de conta reservada em blocos, com a marca mais alta gravada em arquivo
+#
+#Cada processo (ou servidor) tem o seu AlocadorNumeros e reserva um bloco de números de uma
+#vez: lê a marca gravada, soma o tamanho do bloco e grava a nova marca, sob uma trava de
+#arquivo (fcntl.flock) para que outros processos não reservem o mesmo bloco. Os números do
+#bloco são entregues sem nenhuma trava: next() sobre um iterador de range é atômico no CPython,
+#então várias threads podem abrir contas ao mesmo tempo. A trava só é usada na troca de bloco.
+#
+#Como a marca é gravada antes de os números serem usados, um número nunca se repete depois de
+#reiniciar; os números não usados de um bloco ficam de fora da sequência (lacunas).
+#Sem caminho, a sequência fica só em memória.
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class AlocadorNumeros:
+    def __init__(self, caminho=None, tamanho_bloco=100, minimo=1):
+        self._caminho = caminho
+        self._tamanho_bloco = tamanho_bloco
+        #Primeiro número que pode ser usado, ex.: acima das contas já existentes
+        self._minimo = minimo
+        self._marca = minimo - 1
+        self._bloco = iter(())
+        self._trava = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._bloco)
+        except StopIteration:
+            pass
+
+        with self._trava:
+            #Outra thread pode ter trocado o bloco enquanto esta esperava a trava
+            for numero in self._bloco:
+                return numero
+
+            inicio, fim = self._reservar_bloco()
+            self._bloco = iter(range(inicio + 1, fim))
+            return inicio
+
+    def _ler_marca(self):
+        try:
+            with open(self._caminho, encoding="utf-8") as arquivo:
+                return int(arquivo.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _gravar_marca(self, marca):
+        temporario = f"{self._caminho}.tmp"
+
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(str(marca))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+        os.replace(temporario, self._caminho)
+
+    def _reservar_bloco(self):
+        if self._caminho is None:
+            inicio = max(self._marca + 1, self._minimo)
+            self._marca = inicio + self._tamanho_bloco - 1
+            return inicio, self._marca + 1
+
+        with open(f"{self._caminho}.trava", "a") as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+
+            try:
+                inicio = max(self._ler_marca() + 1, self._minimo)
+                self._marca = inicio + self._tamanho_bloco - 1
+                self._gravar_marca(self._marca)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+
+        return inicio, self._marca + 1
@@ -0,0 +1,333 @@
+#Políticas de limites por tipo de conta, carregadas de um arquivo JSON e recarregadas quando ele muda
+#
+#Formato (valores em centavos; sem "operacoes", a regra vale para depósitos e saques):
+#  {
+#    "ContaCorrente": {
+#      "saldo_inicial": 50000,
+#      "regras": [
+#        {"regra": "quantidade_dia", "limite": 2},
+#        {"regra": "valor_maximo_operacao", "operacoes": ["saque"], "centavos": 50000},
+#        {"regra": "valor_dia", "operacoes": ["saque"], "centavos": 150000},
+#        {"regra": "quantidade_janela", "operacoes": ["saque"], "segundos": 3600, "limite": 5},
+#        {"regra": "valor_janela", "operacoes": ["saque"], "segundos": 86400, "centavos": 200000}
+#      ]
+#    }
+#  }
+#
+#Cada conta guarda um estado por regra (contador e soma do dia, fila da janela), atualizado a
+#cada transação aceita, então a verificação não percorre o histórico. O estado é identificado
+#pelo tipo da regra, pelas operações e pela janela, não pelo limite: alterar só o limite no
+#arquivo mantém as contagens. Os estados são gravados no snapshot do diário (copia). Um estado
+#criado depois (regra nova) é preenchido uma única vez com as transações recentes da conta.
+#
+#As regras são verificadas na ordem do arquivo e a primeira excedida define o motivo da falha.
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import date, datetime, timedelta
+
+OPERACOES = frozenset(("deposito", "saque"))
+
+class EstadoDia:
+    #Quantidade e soma das transações do dia corrente, zeradas na virada do dia
+    __slots__ = ("_inicio", "_fim", "quantidade", "centavos")
+
+    def __init__(self):
+        self._inicio = self._fim = 0.0
+        self.quantidade = 0
+        self.centavos = 0
+
+    def inicio(self, instante):
+        return datetime.combine(date.fromtimestamp(instante), datetime.min.time()).timestamp()
+
+    def atualizar(self, instante):
+        if not self._inicio <= instante < self._fim:
+            self._inicio = self.inicio(instante)
+            self._fim = (datetime.fromtimestamp(self._inicio) + timedelta(days=1)).timestamp()
+            self.quantidade = 0
+            self.centavos = 0
+
+    def registrar(self, centavos, instante):
+        self.atualizar(instante)
+        self.quantidade += 1
+        self.centavos += centavos
+
+    def copia(self):
+        estado = EstadoDia()
+        estado._inicio, estado._fim = self._inicio, self._fim
+        estado.quantidade, estado.centavos = self.quantidade, self.centavos
+        return estado
+
+class EstadoJanela:
+    #Transações dos últimos `segundos`, com a soma mantida ao entrar e sair da fila
+    __slots__ = ("_segundos", "_entradas", "centavos")
+
+    def __init__(self, segundos):
+        self._segundos = segundos
+        self._entradas = deque()
+        self.centavos = 0
+
+    @property
+    def quantidade(self):
+        return len(self._entradas)
+
+    def inicio(self, instante):
+        return instante - self._segundos
+
+    def atualizar(self, instante):
+        limite = instante - self._segundos
+        entradas = self._entradas
+
+        while entradas and entradas[0][0] <= limite:
+            self.centavos -= entradas.popleft()[1]
+
+    def registrar(self, centavos, instante):
+        self.atualizar(instante)
+        self._entradas.append((instante, centavos))
+        self.centavos += centavos
+
+    def copia(self):
+        estado = EstadoJanela(self._segundos)
+        estado._entradas.extend(self._entradas)
+        estado.centavos = self.centavos
+        return estado
+
+class Regra(ABC):
+    __slots__ = ("operacoes",)
+
+    motivo = None
+
+    def __init__(self, operacoes=OPERACOES):
+        operacoes = frozenset(operacoes)
+
+        if not operacoes or not operacoes <= OPERACOES:
+            raise ValueError(f"Operações inválidas: {sorted(operacoes)}")
+
+        self.operacoes = operacoes
+
+    @property
+    def chave(self):
+        #Identifica o estado compartilhado pelas regras; None para regras sem estado
+        return None
+
+    def novo_estado(self):
+        return None
+
+    @abstractmethod
+    def excede(self, estado, centavos, instante):
+        pass
+
+class RegraValorMaximoOperacao(Regra):
+    __slots__ = ("centavos",)
+
+    motivo = "limite_valor_excedido"
+
+    def __init__(self, centavos, operacoes=OPERACOES):
+        super().__init__(operacoes)
+        self.centavos = centavos
+
+    def excede(self, estado, centavos, instante):
+        return centavos > self.centavos
+
+class RegraDia(Regra):
+    __slots__ = ()
+
+    @property
+    def chave(self):
+        return ("dia", self.operacoes)
+
+    def novo_estado(self):
+        return EstadoDia()
+
+class RegraQuantidadeDia(RegraDia):
+    __slots__ = ("limite",)
+
+    motivo = "limite_transacoes_dia_excedido"
+
+    def __init__(self, limite, operacoes=OPERACOES):
+        super().__init__(operacoes)
+        self.limite = limite
+
+    def excede(self, estado, centavos, instante):
+        estado.atualizar(instante)
+        return estado.quantidade >= self.limite
+
+class RegraValorDia(RegraDia):
+    __slots__ = ("centavos",)
+
+    motivo = "limite_valor_dia_excedido"
+
+    def __init__(self, centavos, operacoes=OPERACOES):
+        super().__init__(operacoes)
+        self.centavos = centavos
+
+    def excede(self, estado, centavos, instante):
+        estado.atualizar(instante)
+        return estado.centavos + centavos > self.centavos
+
+class RegraJanela(Regra):
+    __slots__ = ("segundos",)
+
+    motivo = "limite_janela_excedido"
+
+    def __init__(self, segundos, operacoes=OPERACOES):
+        super().__init__(operacoes)
+        self.segundos = segundos
+
+    @property
+    def chave(self):
+        return ("janela", self.operacoes, self.segundos)
+
+    def novo_estado(self):
+        return EstadoJanela(self.segundos)
+
+class RegraQuantidadeJanela(RegraJanela):
+    __slots__ = ("limite",)
+
+    def __init__(self, segundos, limite, operacoes=OPERACOES):
+        super().__init__(segundos, operacoes)
+        self.limite = limite
+
+    def excede(self, estado, centavos, instante):
+        estado.atualizar(instante)
+        return estado.quantidade >= self.limite
+
+class RegraValorJanela(RegraJanela):
+    __slots__ = ("centavos",)
+
+    def __init__(self, segundos, centavos, operacoes=OPERACOES):
+        super().__init__(segundos, operacoes)
+        self.centavos = centavos
+
+    def excede(self, estado, centavos, instante):
+        estado.atualizar(instante)
+        return estado.centavos + centavos > self.centavos
+
+REGRAS = {
+    "valor_maximo_operacao": RegraValorMaximoOperacao,
+    "quantidade_dia": RegraQuantidadeDia,
+    "valor_dia": RegraValorDia,
+    "quantidade_janela": RegraQuantidadeJanela,
+    "valor_janela": RegraValorJanela,
+}
+
+def criar_regra(configuracao):
+    parametros = dict(configuracao)
+    classe = REGRAS.get(parametros.pop("regra", None))
+
+    if classe is None:
+        raise ValueError(f"Regra desconhecida: {configuracao.get('regra')!r}")
+
+    return classe(**parametros)
+
+class Politica:
+    def __init__(self, saldo_inicial, regras):
+        self.saldo_inicial = saldo_inicial
+        self.regras = tuple(regras)
+
+        #Um exemplar de cada estado usado pelas regras, para atualizar cada estado uma única vez
+        self._estados = {}
+
+        for regra in self.regras:
+            if regra.chave is not None:
+                self._estados.setdefault(regra.chave, regra)
+
+    @classmethod
+    def de_configuracao(cls, configuracao):
+        return cls(configuracao["saldo_inicial"], [criar_regra(regra) for regra in configuracao.get("regras", ())])
+
+    def valor_maximo_operacao(self, operacao):
+        limites = [
+            regra.centavos for regra in self.regras
+            if isinstance(regra, RegraValorMaximoOperacao) and operacao in regra.operacoes
+        ]
+        return min(limites) if limites else None
+
+    def _estado(self, estados, regra, instante, recentes):
+        estado = estados.get(regra.chave)
+
+        if estado is None:
+            estado = estados[regra.chave] = regra.novo_estado()
+
+            #Preenche o estado novo com as transações da conta desde o início do dia ou da janela
+            if recentes is not None:
+                for operacao, centavos, momento in recentes(estado.inicio(instante)):
+                    if operacao in regra.operacoes:
+                        estado.registrar(centavos, momento)
+
+        return estado
+
+    def verificar(self, estados, operacao, centavos, instante, recentes=None):
+        #Devolve o motivo da primeira regra excedida ou None se a operação é permitida.
+        #recentes(desde) devolve as transações (operacao, centavos, instante) da conta a partir de desde
+        for regra in self.regras:
+            if operacao not in regra.operacoes:
+                continue
+
+            estado = self._estado(estados, regra, instante, recentes) if regra.chave is not None else None
+
+            if regra.excede(estado, centavos, instante):
+                return regra.motivo
+
+        return None
+
+    def registrar(self, estados, operacao, centavos, instante):
+        for chave, regra in self._estados.items():
+            if operacao in regra.operacoes:
+                estado = estados.get(chave)
+
+                if estado is None:
+                    estado = estados[chave] = regra.novo_estado()
+
+                estado.registrar(centavos, instante)
+
+class MotorPoliticas:
+    #Políticas por tipo de conta; com um arquivo carregado, confere a data de modificação dele
+    #no máximo uma vez a cada `intervalo_verificacao` segundos e recarrega quando muda
+    def __init__(self, configuracao=None, intervalo_verificacao=1.0):
+        self._politicas = {}
+        self._caminho = None
+        self._modificacao = None
+        self._intervalo = intervalo_verificacao
+        self._proxima_verificacao = 0.0
+        self.ultimo_erro = None
+
+        if configuracao is not None:
+            self.definir(configuracao)
+
+    def definir(self, configuracao):
+        self._politicas = {
+            tipo_conta: Politica.de_configuracao(politica) for tipo_conta, politica in configuracao.items()
+        }
+
+    def carregar(self, caminho):
+        modificacao = os.stat(caminho).st_mtime_ns
+
+        with open(caminho, encoding="utf-8") as arquivo:
+            self.definir(json.load(arquivo))
+
+        self._caminho = caminho
+        self._modificacao = modificacao
+        self.ultimo_erro = None
+
+    def _recarregar_se_alterado(self):
+        agora = time.monotonic()
+
+        if self._caminho is None or agora < self._proxima_verificacao:
+            return
+
+        self._proxima_verificacao = agora + self._intervalo
+
+        try:
+            if os.stat(self._caminho).st_mtime_ns != self._modificacao:
+                self.carregar(self._caminho)
+
+        #Um arquivo inválido não derruba as operações: as políticas anteriores continuam valendo
+        except (OSError, ValueError, KeyError, TypeError) as erro:
+            self.ultimo_erro = erro
+
+    def politica(self, tipo_conta):
+        self._recarregar_se_alterado()
+        return self._politicas.get(tipo_conta)
@@ -0,0 +1,179 @@
+#Servidor asyncio com as operações do menu, para várias sessões ao mesmo tempo
+#
+#Protocolo: uma requisição JSON por linha e uma resposta JSON por linha, por exemplo
+#  {"operacao": "deposito", "cpf": "11122233344", "valor": 100}
+#  {"ok": true, "resultado": "sucesso", "saldo": "600.00"}
+#
+#Operações: saque, deposito, extrato, cadastrar_cliente, cadastrar_conta, listar_contas.
+#saque, deposito e extrato aceitam "conta" com o número da conta; sem ele, usam a primeira do cliente.
+#Valores e saldos trafegam em reais e são convertidos para centavos na entrada. Nas respostas vão como
+#texto com duas casas (formatar_reais), exatos mesmo acima de 2**53 centavos, onde o float arredonda.
+#Campos com o tipo errado (ex.: "conta" que não é um inteiro) respondem {"ok": false, "erro": "requisicao_invalida"}.
+#Todas as sessões são atendidas pelo mesmo loop de eventos, então as operações sobre as
+#contas nunca executam em paralelo e não precisam de travas.
+#
+#Uso: python servidor.py [--host 127.0.0.1] [--porta 8888] [--unix caminho.sock]
+import argparse
+import asyncio
+import json
+
+from desafio_date_time_sistema_bancario import Banco, Deposito, ErroBanco, Saque, formatar_reais, para_centavos
+
+class ErroRequisicao(Exception):
+    pass
+
+class ServidorBanco:
+    #Traduz as requisições JSON para as operações do Banco
+    def __init__(self, banco=None):
+        self.banco = banco if banco is not None else Banco()
+
+        self._operacoes = {
+            "saque": self.saque,
+            "deposito": self.deposito,
+            "extrato": self.extrato,
+            "cadastrar_cliente": self.cadastrar_cliente,
+            "cadastrar_conta": self.cadastrar_conta,
+            "listar_contas": self.listar_contas,
+        }
+
+    @staticmethod
+    def _campo(requisicao, nome, tipos, obrigatorio=False):
+        #Campo ausente ou null vale None; com outro tipo (ex.: "conta": [1]) a requisição é inválida
+        valor = requisicao.get(nome)
+
+        if valor is None:
+            if obrigatorio:
+                raise ErroRequisicao(f"campo_obrigatorio:{nome}")
+
+            return None
+
+        if isinstance(valor, bool) or not isinstance(valor, tipos):
+            raise ErroRequisicao("requisicao_invalida")
+
+        return valor
+
+    def _cpf(self, requisicao, obrigatorio=False):
+        cpf = self._campo(requisicao, "cpf", (str, int), obrigatorio)
+        return "" if cpf is None else str(cpf)
+
+    def _conta(self, requisicao):
+        return self.banco.conta(self._cpf(requisicao), self._campo(requisicao, "conta", int))
+
+    def _transacao(self, requisicao, classe_transacao):
+        conta = self._conta(requisicao)
+        #true/false são recusados aqui: para_centavos aceitaria True como R$ 1,00
+        valor = self._campo(requisicao, "valor", (int, float, str), obrigatorio=True)
+
+        try:
+            transacao = classe_transacao(para_centavos(valor))
+        except (TypeError, ValueError):
+            raise ErroRequisicao("valor_invalido")
+
+        resultado = self.banco.realizar_transacao(conta.cliente.cpf, transacao, conta.numero)
+
+        return {"ok": bool(resultado), "resultado": resultado.value, "saldo": formatar_reais(conta.saldo)}
+
+    def saque(self, requisicao):
+        return self._transacao(requisicao, Saque)
+
+    def deposito(self, requisicao):
+        return self._transacao(requisicao, Deposito)
+
+    def extrato(self, requisicao):
+        conta = self._conta(requisicao)
+
+        transacoes = [
+            {"tipo": transacao["tipo"], "valor": formatar_reais(transacao["valor"]), "data": transacao["data"].isoformat()}
+            for transacao in self.banco.extrato(conta.cliente.cpf, conta.numero, self._campo(requisicao, "tipo", str) or "")
+        ]
+
+        return {"ok": True, "conta": conta.numero, "saldo": formatar_reais(conta.saldo), "transacoes": transacoes}
+
+    def cadastrar_cliente(self, requisicao):
+        self.banco.cadastrar_cliente(
+            self._cpf(requisicao, obrigatorio=True),
+            self._campo(requisicao, "nome", str, obrigatorio=True),
+            self._campo(requisicao, "endereco", str, obrigatorio=True),
+            self._campo(requisicao, "data_nasc", str, obrigatorio=True),
+        )
+
+        return {"ok": True}
+
+    def cadastrar_conta(self, requisicao):
+        conta = self.banco.cadastrar_conta(self._cpf(requisicao))
+
+        return {"ok": True, "conta": conta.numero}
+
+    def listar_contas(self, requisicao):
+        contas = [
+            {
+                "agencia": conta.agencia,
+                "numero": conta.numero,
+                "titular": conta.cliente.nome,
+                "saldo": formatar_reais(conta.saldo),
+            }
+            for conta in self.banco.listar_contas()
+        ]
+
+        return {"ok": True, "contas": contas}
+
+    def processar(self, linha):
+        try:
+            requisicao = json.loads(linha)
+            operacao = self._operacoes.get(requisicao.get("operacao"))
+
+            if operacao is None:
+                raise ErroRequisicao("operacao_invalida")
+
+            return operacao(requisicao)
+
+        except ErroRequisicao as erro:
+            return {"ok": False, "erro": str(erro)}
+
+        except ErroBanco as erro:
+            return {"ok": False, "erro": erro.codigo}
+
+        except (ValueError, AttributeError, TypeError):
+            return {"ok": False, "erro": "requisicao_invalida"}
+
+    async def atender(self, leitor, escritor):
+        try:
+            while linha := await leitor.readline():
+                resposta = self.processar(linha)
+                escritor.write(json.dumps(resposta).encode("utf-8") + b"\n")
+
+                #Só espera o envio quando o buffer de saída da sessão passa do limite
+                await escritor.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host="127.0.0.1", porta=8888, caminho_unix=None):
+        if caminho_unix:
+            return await asyncio.start_unix_server(self.atender, path=caminho_unix)
+
+        return await asyncio.start_server(self.atender, host, porta, backlog=4096)
+
+async def executar(host, porta, caminho_unix):
+    servidor = await ServidorBanco().iniciar(host, porta, caminho_unix)
+
+    async with servidor:
+        await servidor.serve_forever()
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Servidor do Banco PC")
+    argumentos.add_argument("--host", default="127.0.0.1")
+    argumentos.add_argument("--porta", type=int, default=8888)
+    argumentos.add_argument("--unix", dest="caminho_unix")
+    opcoes = argumentos.parse_args()
+
+    try:
+        asyncio.run(executar(opcoes.host, opcoes.porta, opcoes.caminho_unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()